@@ -0,0 +1,120 @@
+package main
+
+import (
+	"fmt"
+	"image"
+	"log"
+	"os"
+	"path/filepath"
+	"sort"
+	"time"
+)
+
+// assetManifest lists the assets loaded at startup, so setting up a level
+// finds everything already decoded. Fogs are scaled to the maze, so only
+// their decoding happens here.
+var assetManifest = struct {
+	images   []string
+	textures []string
+	sounds   []string
+}{
+	images: []string{
+		"hero_dude.png", "other_dude.png", "ghost.png",
+		"fog01.png", "fog01_inverse.png", "fog02.png", "fog02_inverse.png",
+		"fog03.png", "fog03_inverse.png", "fog04.png", "fog04_inverse.png",
+		"fog05.png", "fog05_inverse.png", "fog06.png", "fog06_inverse.png",
+	},
+	textures: []string{
+		"exclamation.png", "instructions.png", "key.png", "lock.png", "spark.png",
+	},
+	sounds: []string{
+		"death.wav", "exclamation.wav", "mutate.wav", "open_door.wav",
+		"pickup_friend.wav", "pickup_key.wav",
+	},
+}
+
+// assetStat is what an asset cost to load and how much of it stays
+// resident, decoded and uploaded copies together.
+type assetStat struct {
+	load  time.Duration
+	bytes int
+}
+
+var (
+	decodedImages = make(map[string]image.Image)
+	sharedImages  = make(map[string]*Image)
+	assetStats    = make(map[string]*assetStat)
+)
+
+func preloadAssets() {
+	start := time.Now()
+	for _, name := range assetManifest.images {
+		decodeImage(filepath.Join(*dataDir, name))
+	}
+	for _, name := range assetManifest.textures {
+		loadImage(name)
+	}
+	for _, name := range assetManifest.sounds {
+		loadSound(name)
+	}
+	if *showAssets {
+		fmt.Printf("preloaded %d assets in %v\n", len(assetStats), time.Since(start))
+	}
+}
+
+// decodeImage decodes filename the first time it is asked for and hands
+// out the same image from then on; it must not be modified.
+func decodeImage(filename string) image.Image {
+	if img, found := decodedImages[filename]; found {
+		return img
+	}
+
+	log.SetPrefix("image: ")
+	start := time.Now()
+	f, err := os.Open(filename)
+	if err != nil {
+		log.Fatal(err)
+	}
+	defer f.Close()
+
+	img, _, err := image.Decode(f)
+	if err != nil {
+		log.Fatal(err)
+	}
+
+	r := img.Bounds()
+	recordAsset(filename, time.Since(start), r.Dx()*r.Dy()*4)
+	decodedImages[filename] = img
+	return img
+}
+
+func recordAsset(filename string, load time.Duration, bytes int) {
+	s := assetStats[filename]
+	if s == nil {
+		s = &assetStat{}
+		assetStats[filename] = s
+	}
+	s.load += load
+	s.bytes += bytes
+}
+
+func reportAssets() {
+	var (
+		names []string
+		load  time.Duration
+		bytes int
+	)
+	for name := range assetStats {
+		names = append(names, name)
+	}
+	sort.Strings(names)
+
+	fmt.Printf("%-32s %12s %10s\n", "asset", "load", "KiB")
+	for _, name := range names {
+		s := assetStats[name]
+		fmt.Printf("%-32s %12v %10d\n", filepath.Base(name), s.load, s.bytes/1024)
+		load += s.load
+		bytes += s.bytes
+	}
+	fmt.Printf("%-32s %12v %10d\n", "total", load, bytes/1024)
+}
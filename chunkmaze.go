@@ -0,0 +1,118 @@
+package main
+
+import (
+	"container/list"
+	"math/rand"
+)
+
+// ChunkedMaze is an unbounded maze built from square chunks that are
+// generated on demand and evicted least recently used first. Every chunk is
+// carved from a seed derived from the world seed and its position, and the
+// single passage through each chunk border is derived the same way, so an
+// evicted chunk comes back exactly as it was generated. Changes made to a
+// chunk are lost when it is evicted.
+type ChunkedMaze struct {
+	seed      int64
+	size      int
+	capacity  int
+	algo      *MazeAlgorithm
+	chunks    map[chunkKey]*list.Element
+	lru       *list.List
+	generated int
+	evicted   int
+}
+
+type chunkKey struct {
+	cx, cy int
+}
+
+type mazeChunk struct {
+	key  chunkKey
+	maze *Maze
+}
+
+// newChunkedMaze makes a world of size x size cell chunks carved with algo,
+// keeping at most capacity chunks in memory.
+func newChunkedMaze(seed int64, size, capacity int, algo *MazeAlgorithm) *ChunkedMaze {
+	return &ChunkedMaze{
+		seed:     seed,
+		size:     size,
+		capacity: capacity,
+		algo:     algo,
+		chunks:   make(map[chunkKey]*list.Element),
+		lru:      list.New(),
+	}
+}
+
+// chunkHash mixes the world seed with a position and a salt (splitmix64).
+func (w *ChunkedMaze) chunkHash(cx, cy, salt int) uint64 {
+	z := uint64(w.seed) ^ uint64(cx)*0x9E3779B97F4A7C15 ^ uint64(cy)*0xC2B2AE3D27D4EB4F ^ uint64(salt)*0x165667B19E3779F9
+	z += 0x9E3779B97F4A7C15
+	z = (z ^ z>>30) * 0xBF58476D1CE4E5B9
+	z = (z ^ z>>27) * 0x94D049BB133111EB
+	return z ^ z>>31
+}
+
+// Chunk returns the maze of chunk (cx, cy), generating it if it is not in
+// memory and evicting the least recently used chunk when over capacity.
+func (w *ChunkedMaze) Chunk(cx, cy int) *Maze {
+	k := chunkKey{cx, cy}
+	if e, found := w.chunks[k]; found {
+		w.lru.MoveToFront(e)
+		return e.Value.(*mazeChunk).maze
+	}
+
+	m := &Maze{width: w.size, height: w.size, algo: w.algo}
+	m.rnd = rand.New(rand.NewSource(int64(w.chunkHash(cx, cy, 0))))
+	w.algo.Reset(m)
+	w.algo.Gen(m)
+	w.chunks[k] = w.lru.PushFront(&mazeChunk{k, m})
+	w.generated++
+
+	for w.lru.Len() > w.capacity {
+		e := w.lru.Back()
+		delete(w.chunks, e.Value.(*mazeChunk).key)
+		w.lru.Remove(e)
+		w.evicted++
+	}
+	return m
+}
+
+// IsOpen reports whether world cell (x, y) is open in direction dir.
+// Passages across chunk borders are answered without loading the chunk
+// on the other side. Neighbors are found in world coordinates; a chunk's
+// own MazeNode wraps around inside the chunk and knows nothing of its
+// borders, so it is not handed out.
+func (w *ChunkedMaze) IsOpen(x, y, dir int) bool {
+	cx, cy := floorDiv(x, w.size), floorDiv(y, w.size)
+	lx, ly := x-cx*w.size, y-cy*w.size
+	switch {
+	case dir == Left && lx == 0:
+		return w.borderOpen(cx-1, cy, Right, ly)
+	case dir == Right && lx == w.size-1:
+		return w.borderOpen(cx, cy, Right, ly)
+	case dir == Up && ly == 0:
+		return w.borderOpen(cx, cy-1, Down, lx)
+	case dir == Down && ly == w.size-1:
+		return w.borderOpen(cx, cy, Down, lx)
+	}
+	return w.Chunk(cx, cy).isOpen(ly*w.size+lx, dir)
+}
+
+// borderOpen reports whether the border on the dir (Right or Down) side of
+// chunk (cx, cy) has its passage at offset p along the border.
+func (w *ChunkedMaze) borderOpen(cx, cy, dir, p int) bool {
+	return int(w.chunkHash(cx, cy, 1+dir)%uint64(w.size)) == p
+}
+
+// Touch makes sure every chunk within radius cells of world cell (x, y) is
+// in memory, so whatever is approaching them does not wait on generation.
+func (w *ChunkedMaze) Touch(x, y, radius int) {
+	cx0, cx1 := floorDiv(x-radius, w.size), floorDiv(x+radius, w.size)
+	cy0, cy1 := floorDiv(y-radius, w.size), floorDiv(y+radius, w.size)
+	for cy := cy0; cy <= cy1; cy++ {
+		for cx := cx0; cx <= cx1; cx++ {
+			w.Chunk(cx, cy)
+		}
+	}
+}
@@ -0,0 +1,115 @@
+package main
+
+// corridorIndex records for every cell the straight run of open passages
+// it lies in, horizontally and vertically, as the first and last cell of
+// the run along that axis. Two cells of a row see each other exactly when
+// they share the run, so line of sight is a couple of comparisons. Wall
+// changes only rewrite the run they join or split.
+type corridorIndex struct {
+	// first and last are indexed by axis, horizontal then vertical,
+	// and hold x or y coordinates respectively
+	first [2][]int32
+	last  [2][]int32
+}
+
+const (
+	horizontal = iota
+	vertical
+)
+
+// axisOf returns the axis of dir and the cell step along it.
+func (m *Maze) axisOf(dir int) (axis, step int) {
+	if dir == Left || dir == Right {
+		return horizontal, 1
+	}
+	return vertical, m.width
+}
+
+// corridors returns the corridor index, building it on first use.
+func (m *Maze) corridors() *corridorIndex {
+	if m.runs != nil {
+		return m.runs
+	}
+
+	c := &corridorIndex{}
+	for axis := range c.first {
+		c.first[axis] = make([]int32, len(m.walls))
+		c.last[axis] = make([]int32, len(m.walls))
+	}
+	for y := 0; y < m.height; y++ {
+		for x := 0; x < m.width; x++ {
+			i := y*m.width + x
+			if x == 0 || !m.isOpen(i, Left) {
+				c.relabel(m, i, horizontal)
+			}
+			if y == 0 || !m.isOpen(i, Up) {
+				c.relabel(m, i, vertical)
+			}
+		}
+	}
+	m.runs = c
+	return c
+}
+
+// relabel rewrites the run that starts at cell i along axis.
+func (c *corridorIndex) relabel(m *Maze, i, axis int) {
+	open, step, size := Right, 1, m.width
+	pos := i % m.width
+	if axis == vertical {
+		open, step, size = Down, m.width, m.height
+		pos = i / m.width
+	}
+
+	end := pos
+	for j := i; end < size-1 && m.isOpen(j, open); j += step {
+		end++
+	}
+	for j, p := i, pos; p <= end; j, p = j+step, p+1 {
+		c.first[axis][j] = int32(pos)
+		c.last[axis][j] = int32(end)
+	}
+}
+
+// wallChanged rewrites the runs on either side of the wall of cell i in
+// direction dir after it was opened or closed.
+func (c *corridorIndex) wallChanged(m *Maze, i, dir int) {
+	// work from the cell above or left of the wall; dir|1 is then the
+	// direction of the wall from it
+	axis, step := m.axisOf(dir)
+	if dir == Left || dir == Up {
+		i -= step
+	}
+	pos := i % m.width
+	if axis == vertical {
+		pos = i / m.width
+	}
+
+	c.relabel(m, i-(pos-int(c.first[axis][i]))*step, axis)
+	if !m.isOpen(i, dir|1) {
+		c.relabel(m, i+step, axis)
+	}
+}
+
+// CorridorSees reports whether looking from cell (x, y) in direction dir
+// along the open corridor reaches any of the cells [x0, x1] x [y0, y1].
+// The cell (x, y) itself counts as seen.
+func (m *Maze) CorridorSees(x, y, dir, x0, y0, x1, y1 int) bool {
+	c := m.corridors()
+	i := y*m.width + x
+	axis, _ := m.axisOf(dir)
+
+	lo, hi := x, x
+	if axis == vertical {
+		lo, hi = y, y
+	}
+	if dir == Left || dir == Up {
+		lo = int(c.first[axis][i])
+	} else {
+		hi = int(c.last[axis][i])
+	}
+
+	if axis == horizontal {
+		return y0 <= y && y <= y1 && lo <= x1 && x0 <= hi
+	}
+	return x0 <= x && x <= x1 && lo <= y1 && y0 <= hi
+}
@@ -35,3 +35,20 @@ var BadColors = []sdl.Color{
 	DarkGray,
 	BrightWhite,
 }
+
+// EGAPalette lists the 16 EGA colors in their hardware order so that a
+// color can be stored as a single byte index.
+var EGAPalette = []sdl.Color{
+	Black, Blue, Green, Cyan, Red, Magenta, Brown, LightGray,
+	DarkGray, BrightBlue, BrightGreen, BrightCyan,
+	BrightRed, BrightMagenta, BrightYellow, BrightWhite,
+}
+
+func egaIndex(c sdl.Color) uint8 {
+	for i, p := range EGAPalette {
+		if p == c {
+			return uint8(i)
+		}
+	}
+	panic("color not in EGA palette")
+}
@@ -15,6 +15,15 @@ type Entity struct {
 	vx, vy    int
 	dvx, dvy  int
 	isDead    bool
-	dir       string
-	wantedDir string
+	dir       int
+	wantedDir int
+	spin      int
+}
+
+// deathSpin is the quarter turns a dead entity steps through, one a frame.
+var deathSpin = [4]float64{0, 90, 180, 270}
+
+func (e *Entity) spinDead() {
+	e.spin = (e.spin + 1) % len(deathSpin)
+	e.image.angle = deathSpin[e.spin]
 }
\ No newline at end of file
@@ -0,0 +1,67 @@
+package main
+
+// flowField is a breadth first search of the open passages rooted at one
+// cell: the distance of every cell from the root and the direction to step
+// from it to get one cell closer. Any number of mobs can steer by it with
+// a lookup each, and it is only searched again when the root cell moves or
+// a wall changes.
+type flowField struct {
+	root  int
+	valid bool
+	dist  []int32 // -1 for cells that cannot reach the root
+	dir   []int8  // NoDir at the root and at unreachable cells
+	queue []int32
+}
+
+// FlowTo returns the flow field rooted at cell (x, y), searching it again
+// only if it is stale.
+func (m *Maze) FlowTo(x, y int) *flowField {
+	root := m.Node(x, y).index()
+	f := m.flow
+	if f == nil {
+		f = &flowField{
+			dist:  make([]int32, len(m.walls)),
+			dir:   make([]int8, len(m.walls)),
+			queue: make([]int32, 0, len(m.walls)),
+		}
+		m.flow = f
+	}
+	if f.valid && f.root == root {
+		return f
+	}
+
+	for i := range f.dist {
+		f.dist[i] = -1
+		f.dir[i] = NoDir
+	}
+	f.root = root
+	f.dist[root] = 0
+	f.queue = append(f.queue[:0], int32(root))
+	for k := 0; k < len(f.queue); k++ {
+		i := int(f.queue[k])
+		for dir := Up; dir <= Right; dir++ {
+			if !m.isOpen(i, dir) {
+				continue
+			}
+			o := m.neighbor(i, dir)
+			if f.dist[o] < 0 {
+				f.dist[o] = f.dist[i] + 1
+				f.dir[o] = int8(opposite(dir))
+				f.queue = append(f.queue, int32(o))
+			}
+		}
+	}
+	f.valid = true
+	return f
+}
+
+// Dir returns the direction to step from n towards the root, or NoDir.
+func (f *flowField) Dir(n MazeNode) int {
+	return int(f.dir[n.index()])
+}
+
+// Dist returns the number of steps from n to the root, or -1 if the root
+// cannot be reached from n.
+func (f *flowField) Dist(n MazeNode) int {
+	return int(f.dist[n.index()])
+}
@@ -1,8 +1,6 @@
 package main
 
 import (
-	"math/rand"
-
 	"github.com/qeedquan/go-media/sdl"
 	"github.com/qeedquan/go-media/sdl/sdlmixer"
 )
@@ -16,12 +14,23 @@ var fogFiles = [][2]string{
 	{"fog06.png", "fog06_inverse.png"},
 }
 
-var mazeColors []sdl.Color
+// fogKey identifies a fog pair scaled to the size of a maze in pixels.
+type fogKey struct {
+	name          string
+	width, height int
+}
 
-func init() {
-	mazeColors = append(mazeColors, SpriteColors...)
+// fogImages is a fog and its inverse scaled to a maze, with the coverage
+// mask of the fog. They are shared by every fog using the same file on a
+// maze of the same size and live for the rest of the program.
+type fogImages struct {
+	fog     *Image
+	inverse *Image
+	mask    *fogMask
 }
 
+var fogCache = make(map[fogKey]*fogImages)
+
 type Fog struct {
 	Blitter
 	gs          *GameState
@@ -30,53 +39,107 @@ type Fog struct {
 	mutateCount int
 	flashCount  int
 
+	colors  []sdl.Color // the order the fog paints the maze in
 	pal     int
 	vx, vy  int
 	passed  bool
 	mutated bool
 	fog     *Image
 	inverse *Image
+	mask    *fogMask
+}
+
+// fogMask marks the pixels of a fog image that cover what is under them,
+// extracted once so covered cells can be picked out by indexing.
+type fogMask struct {
+	width, height int
+	covered       []bool
+}
+
+func newFogMask(m *Image) *fogMask {
+	a := m.alpha
+	r := a.Bounds()
+	k := &fogMask{
+		width:   r.Dx(),
+		height:  r.Dy(),
+		covered: make([]bool, r.Dx()*r.Dy()),
+	}
+	for y := 0; y < k.height; y++ {
+		row := a.Pix[y*a.Stride : y*a.Stride+k.width]
+		for x, v := range row {
+			k.covered[y*k.width+x] = v > 0
+		}
+	}
+	return k
+}
+
+// At reports whether pixel (x, y) of the fog is covered.
+func (k *fogMask) At(x, y int) bool {
+	if x < 0 || x >= k.width || y < 0 || y >= k.height {
+		return false
+	}
+	return k.covered[y*k.width+x]
 }
 
 func newFog(gs *GameState) *Fog {
 	f := &Fog{}
 	f.gs = gs
 
-	for i := len(mazeColors) - 1; i >= 1; i-- {
-		j := rand.Intn(i + 1)
-		mazeColors[i], mazeColors[j] = mazeColors[j], mazeColors[i]
+	// shuffled afresh for each fog, so the colors of a level only depend
+	// on its seed and not on the levels played before it
+	f.colors = append([]sdl.Color(nil), SpriteColors...)
+	for i := len(f.colors) - 1; i >= 1; i-- {
+		j := gs.rnd.fog.Intn(i + 1)
+		f.colors[i], f.colors[j] = f.colors[j], f.colors[i]
 	}
 
-	fogChoice := fogFiles[rand.Intn(len(fogFiles))]
-	f.fog = loadFog(fogChoice[0], gs.maze)
-	f.inverse = loadFog(fogChoice[1], gs.maze)
+	fi := loadFog(fogFiles[gs.rnd.fog.Intn(len(fogFiles))], gs.maze)
+	f.fog = fi.fog
+	f.inverse = fi.inverse
+	f.mask = fi.mask
 	f.image = f.fog
 
 	f.mutateSound = loadSound("mutate.wav")
 	f.x = gs.maze.Px()
 	f.vx = -1
-	f.mutateCount = f.x/2 + rand.Intn(f.x*4/3-f.x/2)
+	f.mutateCount = f.x/2 + gs.rnd.fog.Intn(f.x*4/3-f.x/2)
 	return f
 }
 
-func loadFog(name string, m *Maze) *Image {
-	return loadImage(name, scaleImage(m.Px(), m.Py()))
+// loadFog returns the fog pair files scaled to m, decoding and scaling them
+// only the first time they are asked for at that size.
+func loadFog(files [2]string, m *Maze) *fogImages {
+	k := fogKey{files[0], m.Px(), m.Py()}
+	if fi, found := fogCache[k]; found {
+		return fi
+	}
+	fi := &fogImages{
+		fog:     loadImage(files[0], scaleImage(m.Px(), m.Py())),
+		inverse: loadImage(files[1], scaleImage(m.Px(), m.Py())),
+	}
+	fi.mask = newFogMask(fi.fog)
+	fogCache[k] = fi
+	return fi
+}
+
+// warmFogCache loads every fog for m ahead of time, so a new fog rolling in
+// during the level does not decode or allocate anything.
+func warmFogCache(m *Maze) {
+	for _, files := range fogFiles {
+		loadFog(files, m)
+	}
+	loadSound("mutate.wav")
 }
 
 func (f *Fog) mutate() {
 	playSound(f.mutateSound)
 
-	newMazeColor := mazeColors[f.pal]
-	f.pal = (f.pal + 1) % len(mazeColors)
+	newMazeColor := f.colors[f.pal]
+	f.pal = (f.pal + 1) % len(f.colors)
 
-	var selectedNodes []*MazeNode
-	for _, n := range f.gs.maze.nodes {
-		cx := n.x*16 + 8
-		cy := n.y*16 + 8
-		if f.posCoveredWithFog(cx, cy) {
-			n.color = newMazeColor
-			selectedNodes = append(selectedNodes, n)
-		}
+	selectedNodes := f.coveredNodes()
+	for _, n := range selectedNodes {
+		n.SetColor(newMazeColor)
 	}
 
 	var mutateMobs []*Mob
@@ -89,7 +152,7 @@ func (f *Fog) mutate() {
 	}
 
 	for i := len(selectedNodes) - 1; i >= 1; i-- {
-		j := rand.Intn(i + 1)
+		j := f.gs.rnd.fog.Intn(i + 1)
 		selectedNodes[i], selectedNodes[j] = selectedNodes[j], selectedNodes[i]
 	}
 
@@ -101,21 +164,35 @@ func (f *Fog) mutate() {
 		m.FogMutate(x, y)
 	}
 
-	f.gs.maze.RegenSelected(selectedNodes)
+	f.gs.RegenMaze(selectedNodes)
 }
 
-func (f *Fog) posCoveredWithFog(x, y int) bool {
-	fx := x - f.x
-	fy := y - f.y
-
-	if fx < 0 || fx >= f.gs.maze.Px() {
-		return false
-	}
-	if fy < 0 || fy >= f.gs.maze.Py() {
-		return false
+// coveredNodes returns the nodes whose midpoints the fog covers. The mask
+// is sampled row by row, with the columns of cells under the fog worked out
+// once rather than bounds checking every cell.
+func (f *Fog) coveredNodes() []MazeNode {
+	m := f.gs.maze
+	x0 := max(0, -floorDiv(8-f.x, 16))
+	x1 := min(m.width, -floorDiv(8-f.x-f.mask.width, 16))
+
+	var p []MazeNode
+	for y := 0; y < m.height; y++ {
+		fy := y*16 + 8 - f.y
+		if fy < 0 || fy >= f.mask.height {
+			continue
+		}
+		row := f.mask.covered[fy*f.mask.width : (fy+1)*f.mask.width]
+		for x := x0; x < x1; x++ {
+			if row[x*16+8-f.x] {
+				p = append(p, m.Node(x, y))
+			}
+		}
 	}
+	return p
+}
 
-	return f.fog.alpha.AlphaAt(fx, fy).A > 0
+func (f *Fog) posCoveredWithFog(x, y int) bool {
+	return f.mask.At(x-f.x, y-f.y)
 }
 
 func (f *Fog) Update() {
@@ -142,8 +219,3 @@ func (f *Fog) Update() {
 		}
 	}
 }
-
-func (f *Fog) Free() {
-	f.fog.Free()
-	f.inverse.Free()
-}
@@ -2,7 +2,7 @@ package main
 
 import (
 	"fmt"
-	"math/rand"
+	"log"
 
 	"github.com/qeedquan/go-media/sdl"
 	"github.com/qeedquan/go-media/sdl/sdlmixer"
@@ -20,6 +20,7 @@ type Game struct {
 	fog        *Fog
 	lockedDoor *Blitter
 	key        *Key
+	crowd      *mobCrowd
 
 	textFont   *sdlttf.Font
 	timeupFont *sdlttf.Font
@@ -60,26 +61,27 @@ func (g *Game) init() {
 	screen.FillRect(nil)
 	g.mutator.Unbind()
 
-	m := newMaze(22, 18)
-	m.Gen()
+	m := g.newMaze()
 	s.maze = m
 
 	pn := m.Node(0, 0)
 	px, py := pn.Pxy()
 	s.player = newRailsThing(s, px, py)
 
-	ln := m.nodes[len(m.nodes)-1]
+	ln := m.Node(m.width-1, m.height-1)
+	s.lock = ln
 	lx, ly := ln.Pxy()
 	g.lockedDoor = &Blitter{lx, ly, loadImage("lock.png")}
 
-	var availNodes []*MazeNode
-	for _, n := range s.maze.nodes {
+	var availNodes []MazeNode
+	for i := range s.maze.walls {
+		n := s.maze.nodeAt(i)
 		if n.DistanceFrom(pn) > InitDistanceFromPlayer {
 			availNodes = append(availNodes, n)
 		}
 	}
 	for i := len(availNodes) - 1; i >= 1; i-- {
-		j := rand.Intn(i + 1)
+		j := s.rnd.spawn.Intn(i + 1)
 		availNodes[i], availNodes[j] = availNodes[j], availNodes[i]
 	}
 
@@ -90,28 +92,65 @@ func (g *Game) init() {
 
 		mx, my := n.Pxy()
 		mob := newMob(s, mx, my)
-		if rand.Float64() <= 1/3.0 {
+		if s.rnd.spawn.Float64() <= 1/3.0 {
 			mob.ToggleKind()
 		}
 		s.mobs = append(s.mobs, mob)
 	}
 
-	var availKeyNodes []*MazeNode
-	for _, n := range m.nodes {
+	var availKeyNodes []MazeNode
+	for i := range m.walls {
+		n := m.nodeAt(i)
 		if n.DistanceFrom(pn) > InitDistanceFromPlayer &&
 			n.DistanceFrom(ln) > InitDistanceFromPlayer {
 			availKeyNodes = append(availKeyNodes, n)
 		}
 	}
-	kn := availKeyNodes[rand.Intn(len(availKeyNodes))]
+	kn := availKeyNodes[s.rnd.spawn.Intn(len(availKeyNodes))]
 	kx, ky := kn.Pxy()
 	g.key = newKey(kx, ky)
 
+	g.crowd = nil
+	if *crowdSize > 0 {
+		g.crowd = newMobCrowd(m, s.rnd.crowd, s.rnd.crowd, loadMobSprites())
+		for i := 0; i < *crowdSize && i < len(availNodes); i++ {
+			x, y := availNodes[i].Pxy()
+			g.crowd.Add(x, y, s.rnd.crowd.Float64() <= 1/3.0)
+		}
+	}
+
+	warmFogCache(m)
 	g.fog = newFog(s)
 
 	s.startTime = sdl.GetTicks()
 }
 
+// newMaze generates the maze of a level, or loads it with -mazefile.
+func (g *Game) newMaze() *Maze {
+	algo := mazeAlgorithms[*mazeAlgo]
+	if *mazeFile == "" {
+		m := newMaze(22, 18, algo)
+		m.rnd = g.gs.rnd.maze
+		m.Gen()
+		return m
+	}
+
+	log.SetPrefix("maze: ")
+	h, err := readMazeHeader(*mazeFile)
+	if err != nil {
+		log.Fatal(err)
+	}
+	if h.width != 22 || h.height != 18 {
+		log.Fatalf("%s: maze is %dx%d, the game needs 22x18", *mazeFile, h.width, h.height)
+	}
+	m, err := loadMaze(*mazeFile, algo)
+	if err != nil {
+		log.Fatal(err)
+	}
+	m.rnd = g.gs.rnd.maze
+	return m
+}
+
 func (g *Game) event() string {
 	s := g.gs
 	for {
@@ -137,7 +176,7 @@ func (g *Game) event() string {
 				r := sdl.Rect{int32(cx) - mazePos.X, int32(cy) - mazePos.Y,
 					int32(g.mutator.width), int32(g.mutator.height)}
 				selected := s.maze.CollideNodes(r)
-				s.maze.RegenSelected(selected)
+				s.RegenMaze(selected)
 
 				if !*chargeInf {
 					s.charge = 0
@@ -161,6 +200,9 @@ func (g *Game) update() string {
 	for _, m := range s.mobs {
 		m.Update()
 	}
+	if g.crowd != nil {
+		g.crowd.Update(s.player.x, s.player.y)
+	}
 
 	for _, m := range s.AliveMobs() {
 		if s.player.Hitbox().Collide(m.Hitbox()) {
@@ -184,7 +226,6 @@ func (g *Game) update() string {
 
 	g.fog.Update()
 	if g.fog.passed {
-		g.fog.Free()
 		g.fog = newFog(s)
 	}
 
@@ -214,6 +255,8 @@ func (g *Game) draw() {
 	screen.SetDrawColor(bgColor)
 	screen.Clear()
 
+	s.maze.Render()
+
 	g.maze.Bind()
 	s.maze.Blit()
 	g.lockedDoor.Blit()
@@ -221,6 +264,9 @@ func (g *Game) draw() {
 	for _, m := range s.mobs {
 		m.Blit()
 	}
+	if g.crowd != nil {
+		g.crowd.Blit()
+	}
 	s.player.Blit()
 	g.fog.Blit()
 
@@ -1,6 +1,11 @@
 package main
 
-import "github.com/qeedquan/go-media/sdl"
+import (
+	"log"
+	"math/rand"
+
+	"github.com/qeedquan/go-media/sdl"
+)
 
 const (
 	InitDistanceFromPlayer = 5
@@ -32,12 +37,20 @@ type GameState struct {
 	charge int
 
 	maze   *Maze
+	lock   MazeNode
 	player *RailsThing
 	sparks []*Spark
+
+	seed int64
+	rnd  *randStreams
 }
 
 func newGameState() *GameState {
-	return &GameState{}
+	g := &GameState{seed: *gameSeed}
+	if g.seed == 0 {
+		g.seed = rand.Int63()
+	}
+	return g
 }
 
 func (g *GameState) Reset() {
@@ -60,6 +73,9 @@ func (g *GameState) NextLevel() {
 	g.time = max(45, 120-(g.level-1)*20)
 	g.mobsAvail = NumInitMobs + (g.level-1)*3
 	g.charge = MaxCharge
+	// reseeded per level so a level plays out the same whatever happened
+	// in the levels before it
+	g.rnd = newRandStreams(g.seed + int64(g.level))
 }
 
 func (g *GameState) AliveMobs() []*Mob {
@@ -72,16 +88,31 @@ func (g *GameState) AliveMobs() []*Mob {
 	return p
 }
 
+// RegenMaze regenerates the selected nodes of the maze, checking the maze
+// is still sound afterwards when running with -validate.
+func (g *GameState) RegenMaze(selected []MazeNode) {
+	g.maze.RegenSelected(selected)
+	if *validate {
+		p := g.maze.Node((g.player.x+8)/16, (g.player.y+8)/16)
+		if err := g.maze.Validate(p, g.lock); err != nil {
+			log.SetPrefix("maze: ")
+			log.Fatal(err)
+		}
+	}
+}
+
+// PlayerFlow returns the flow field leading to the cell the player is in.
+func (g *GameState) PlayerFlow() *flowField {
+	return g.maze.FlowTo((g.player.x+8)/16, (g.player.y+8)/16)
+}
+
 func (g *GameState) AddSpark(x, y int) {
 	g.sparks = append(g.sparks, &Spark{sdl.GetTicks(), x, y})
 }
 
 func (g *GameState) free() {
-	if g.player != nil {
-		g.player.Free()
-	}
-	for i := range g.mobs {
-		g.mobs[i].Free()
+	if g.maze != nil {
+		g.maze.Free()
 	}
 	g.maze = nil
 	g.player = nil
@@ -4,9 +4,8 @@ import (
 	"image"
 	"image/draw"
 	"log"
-	"math/rand"
-	"os"
 	"path/filepath"
+	"time"
 
 	"github.com/qeedquan/go-media/sdl"
 	"github.com/qeedquan/go-media/sdl/sdlimage"
@@ -88,23 +87,33 @@ type Image struct {
 	angle   float64
 }
 
+// loadImage makes a texture of the named image after applying xforms to
+// it. The file is only ever decoded once; images loaded without xforms are
+// shared by every caller and must not be modified or freed.
 func loadImage(name string, xforms ...func(m image.Image) image.Image) *Image {
 	filename := filepath.Join(*dataDir, name)
-	f, err := os.Open(filename)
-	if err != nil {
-		log.Fatal(err)
-	}
-	defer f.Close()
-
-	img, _, err := image.Decode(f)
-	if err != nil {
-		log.Fatal(err)
+	if len(xforms) == 0 {
+		if m, found := sharedImages[filename]; found {
+			return m
+		}
 	}
 
+	img := decodeImage(filename)
+	start := time.Now()
 	for _, xform := range xforms {
 		img = xform(img)
 	}
 
+	m := newImage(img)
+	if len(xforms) == 0 {
+		recordAsset(filename, time.Since(start), m.width*m.height*4+len(m.alpha.Pix))
+		sharedImages[filename] = m
+	}
+	return m
+}
+
+// newImage uploads img to a texture.
+func newImage(img image.Image) *Image {
 	r := img.Bounds()
 	alpha := image.NewAlpha(image.Rect(0, 0, r.Dx(), r.Dy()))
 	draw.Draw(alpha, alpha.Bounds(), img, image.ZP, draw.Src)
@@ -165,19 +174,15 @@ func (m *Image) Unbind() {
 	}
 }
 
-func colorBlackRandom(palette []sdl.Color) func(m image.Image) image.Image {
+// colorBlack paints every pixel that is not transparent with c.
+func colorBlack(c sdl.Color) func(m image.Image) image.Image {
 	return func(m image.Image) image.Image {
 		p := image.NewRGBA(m.Bounds())
 		draw.Draw(p, p.Bounds(), m, image.ZP, draw.Src)
 
-		rc := palette[rand.Intn(len(palette))]
-		r := p.Bounds()
-		for y := r.Min.Y; y < r.Max.Y; y++ {
-			for x := r.Min.X; x < r.Max.X; x++ {
-				_, _, _, ca := p.RGBAAt(x, y).RGBA()
-				if ca != 0 {
-					p.Set(x, y, rc)
-				}
+		for i := 0; i < len(p.Pix); i += 4 {
+			if p.Pix[i+3] != 0 {
+				p.Pix[i], p.Pix[i+1], p.Pix[i+2], p.Pix[i+3] = c.R, c.G, c.B, c.A
 			}
 		}
 
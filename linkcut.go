@@ -0,0 +1,141 @@
+package main
+
+// linkCutForest is a link-cut tree over nodes 0..n-1. It supports joining
+// two trees, splitting a tree at an edge and asking whether two nodes are
+// in the same tree, each in amortized O(log n).
+type linkCutForest struct {
+	ch    [][2]int32
+	par   []int32
+	rev   []bool
+	stack []int32
+}
+
+func newLinkCutForest(n int) *linkCutForest {
+	t := &linkCutForest{
+		ch:  make([][2]int32, n),
+		par: make([]int32, n),
+		rev: make([]bool, n),
+	}
+	for i := range t.ch {
+		t.ch[i] = [2]int32{-1, -1}
+		t.par[i] = -1
+	}
+	return t
+}
+
+func (t *linkCutForest) isRoot(x int32) bool {
+	p := t.par[x]
+	return p < 0 || (t.ch[p][0] != x && t.ch[p][1] != x)
+}
+
+func (t *linkCutForest) push(x int32) {
+	if !t.rev[x] {
+		return
+	}
+	l, r := t.ch[x][0], t.ch[x][1]
+	t.ch[x][0], t.ch[x][1] = r, l
+	if l >= 0 {
+		t.rev[l] = !t.rev[l]
+	}
+	if r >= 0 {
+		t.rev[r] = !t.rev[r]
+	}
+	t.rev[x] = false
+}
+
+func (t *linkCutForest) rotate(x int32) {
+	p := t.par[x]
+	g := t.par[p]
+	d := 0
+	if t.ch[p][1] == x {
+		d = 1
+	}
+
+	if !t.isRoot(p) {
+		if t.ch[g][0] == p {
+			t.ch[g][0] = x
+		} else {
+			t.ch[g][1] = x
+		}
+	}
+	t.par[x] = g
+
+	c := t.ch[x][d^1]
+	t.ch[p][d] = c
+	if c >= 0 {
+		t.par[c] = p
+	}
+	t.ch[x][d^1] = p
+	t.par[p] = x
+}
+
+func (t *linkCutForest) splay(x int32) {
+	t.stack = append(t.stack[:0], x)
+	for y := x; !t.isRoot(y); {
+		y = t.par[y]
+		t.stack = append(t.stack, y)
+	}
+	for i := len(t.stack) - 1; i >= 0; i-- {
+		t.push(t.stack[i])
+	}
+
+	for !t.isRoot(x) {
+		p := t.par[x]
+		if !t.isRoot(p) {
+			g := t.par[p]
+			if (t.ch[g][0] == p) == (t.ch[p][0] == x) {
+				t.rotate(p)
+			} else {
+				t.rotate(x)
+			}
+		}
+		t.rotate(x)
+	}
+}
+
+func (t *linkCutForest) access(x int32) {
+	last := int32(-1)
+	for y := x; y >= 0; y = t.par[y] {
+		t.splay(y)
+		t.ch[y][1] = last
+		last = y
+	}
+	t.splay(x)
+}
+
+func (t *linkCutForest) makeRoot(x int32) {
+	t.access(x)
+	t.rev[x] = !t.rev[x]
+}
+
+func (t *linkCutForest) findRoot(x int32) int32 {
+	t.access(x)
+	for {
+		t.push(x)
+		if t.ch[x][0] < 0 {
+			break
+		}
+		x = t.ch[x][0]
+	}
+	t.splay(x)
+	return x
+}
+
+func (t *linkCutForest) Connected(a, b int) bool {
+	return a == b || t.findRoot(int32(a)) == t.findRoot(int32(b))
+}
+
+// Link joins the trees holding a and b with the edge a-b; they must not
+// already be connected.
+func (t *linkCutForest) Link(a, b int) {
+	t.makeRoot(int32(a))
+	t.par[a] = int32(b)
+}
+
+// Cut removes the edge a-b, which must be in the forest.
+func (t *linkCutForest) Cut(a, b int) {
+	t.makeRoot(int32(a))
+	t.access(int32(b))
+	t.ch[b][0] = -1
+	t.par[a] = -1
+}
@@ -23,6 +23,13 @@ var (
 	fullscreen = flag.Bool("fullscreen", false, "fullscreen")
 	sfx        = flag.Bool("sfx", true, "sfx")
 	chargeInf  = flag.Bool("chargeinf", false, "infinite charge")
+	mazeRender = flag.String("mazerender", "tile", "maze renderer (line, tile)")
+	mazeAlgo   = flag.String("mazealgo", "braid", "maze algorithm (backtracker, braid, eller, kruskal, wilson)")
+	gameSeed   = flag.Int64("seed", 0, "random seed of the game (0 picks one from the clock)")
+	validate   = flag.Bool("validate", false, "check the maze invariants after every mutation")
+	showAssets = flag.Bool("assets", false, "print the load time and size of every asset on exit")
+	mazeFile   = flag.String("mazefile", "", "play every level on the 22x18 maze saved in this file")
+	crowdSize  = flag.Int("crowd", 0, "add this many mobs run by the crowd engine to every level, drawn but harmless")
 
 	screen  *Display
 	texture *sdl.Texture
@@ -46,7 +53,19 @@ func main() {
 	rand.Seed(time.Now().UnixNano())
 	log.SetFlags(0)
 	flag.Parse()
+	if *genAlgo != "" || *genFile != "" {
+		runMazeBench()
+		return
+	}
+	if _, found := mazeRenderers[*mazeRender]; !found {
+		log.Fatalf("unknown maze renderer %q", *mazeRender)
+	}
+	if _, found := mazeAlgorithms[*mazeAlgo]; !found {
+		log.Fatalf("unknown maze algorithm %q", *mazeAlgo)
+	}
 	initSDL()
+	preloadAssets()
+	warmSprites()
 
 	gameState := newGameState()
 	title := newTitle(gameState)
@@ -72,6 +91,9 @@ func main() {
 			panic(fmt.Sprintf("unreachable state: %q", state))
 		}
 	}
+	if *showAssets {
+		reportAssets()
+	}
 }
 
 func initSDL() {
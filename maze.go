@@ -1,99 +1,74 @@
 package main
 
 import (
+	"image"
 	"math"
+	"math/bits"
 	"math/rand"
 
 	"github.com/qeedquan/go-media/sdl"
 )
 
 var (
-	MazeColor = BrightGreen
+	MazeColor   = BrightGreen
+	MazeBGColor = sdl.Color{0x40, 0x40, 0x40, 0xFF}
 )
 
+// Directions index the wall bits of a cell; opposite directions differ
+// only in the lowest bit.
 const (
 	Up = iota
 	Down
 	Left
 	Right
+
+	NoDir = -1
 )
 
+var dirOffsets = [4]sdl.Point{
+	Up:    {0, -1},
+	Down:  {0, 1},
+	Left:  {-1, 0},
+	Right: {1, 0},
+}
+
+func opposite(dir int) int {
+	return dir ^ 1
+}
+
+// MazeNode is a lightweight view of a single cell; the cell state itself
+// lives in the wall and color arrays of the parent maze.
 type MazeNode struct {
-	id     int
-	x, y   int
-	color  sdl.Color
 	parent *Maze
-	open   [4]bool
+	x, y   int
 }
 
-func newMazeNode(id, x, y int, parent *Maze) *MazeNode {
-	return &MazeNode{
-		id:     id,
-		x:      x,
-		y:      y,
-		color:  MazeColor,
-		parent: parent,
-	}
+func (m MazeNode) index() int {
+	return m.y*m.parent.width + m.x
 }
 
-func (m *MazeNode) Hitbox() sdl.Rect {
+func (m MazeNode) Hitbox() sdl.Rect {
 	return sdl.Rect{int32(m.x) * 16, int32(m.y) * 16, 16, 16}
 }
 
-func (m *MazeNode) Node(dir int) *MazeNode {
-	switch dir {
-	case Up:
-		return m.parent.Node(m.x, m.y-1)
-	case Down:
-		return m.parent.Node(m.x, m.y+1)
-	case Left:
-		return m.parent.Node(m.x-1, m.y)
-	case Right:
-		return m.parent.Node(m.x+1, m.y)
-	}
-
-	panic("unreachable")
+func (m MazeNode) Node(dir int) MazeNode {
+	p := dirOffsets[dir]
+	return m.parent.Node(m.x+int(p.X), m.y+int(p.Y))
 }
 
-func (m *MazeNode) IsOpen(dir int) bool {
-	return m.open[dir]
+func (m MazeNode) IsOpen(dir int) bool {
+	return m.parent.walls[m.index()]&(1<<uint(dir)) == 0
 }
 
-func (m *MazeNode) WallCount() int {
-	n := 0
-	for _, o := range m.open {
-		if !o {
-			n++
-		}
-	}
-	return n
+func (m MazeNode) WallCount() int {
+	return bits.OnesCount8(m.parent.walls[m.index()])
 }
 
-func (m *MazeNode) SetWall(dir int) {
-	switch {
-	case dir == Up && m.open[Up]:
-		m.open[Up] = false
-		o := m.Node(Up)
-		o.open[Down] = false
-
-	case dir == Down && m.open[Down]:
-		m.open[Down] = false
-		o := m.Node(Down)
-		o.open[Up] = false
-
-	case dir == Left && m.open[Left]:
-		m.open[Left] = false
-		o := m.Node(Left)
-		o.open[Right] = false
-
-	case dir == Right && m.open[Right]:
-		m.open[Right] = false
-		o := m.Node(Right)
-		o.open[Left] = false
-	}
+func (m MazeNode) SetWall(dir int) {
+	m.parent.setWall(m.index(), dir)
 }
 
-func (m *MazeNode) HasNode(dir int) bool {
+func (m MazeNode) HasNode(dir int) bool {
 	switch dir {
 	case Up:
 		return m.y > 0
@@ -108,112 +83,137 @@ func (m *MazeNode) HasNode(dir int) bool {
 	}
 }
 
-func (m *MazeNode) ClearWall(dir int) {
-	switch {
-	case dir == Up && !m.open[Up] && m.HasNode(Up):
-		m.open[Up] = true
-		o := m.Node(Up)
-		o.open[Down] = true
-	case dir == Down && !m.open[Down] && m.HasNode(Down):
-		m.open[Down] = true
-		o := m.Node(Down)
-		o.open[Up] = true
-	case dir == Left && !m.open[Left] && m.HasNode(Left):
-		m.open[Left] = true
-		o := m.Node(Left)
-		o.open[Right] = true
-	case dir == Right && !m.open[Right] && m.HasNode(Right):
-		m.open[Right] = true
-		o := m.Node(Right)
-		o.open[Left] = true
+func (m MazeNode) ClearWall(dir int) {
+	if m.HasNode(dir) {
+		m.parent.clearWall(m.index(), dir)
 	}
 }
 
-func (m *MazeNode) AvailDirs() []string {
-	var n []string
-
-	if m.open[Up] {
-		n = append(n, "up")
-	}
-	if m.open[Down] {
-		n = append(n, "down")
-	}
-	if m.open[Left] {
-		n = append(n, "left")
-	}
-	if m.open[Right] {
-		n = append(n, "right")
+func (m MazeNode) AvailDirs() []int {
+	var n []int
+	for dir := Up; dir <= Right; dir++ {
+		if m.IsOpen(dir) {
+			n = append(n, dir)
+		}
 	}
 	return n
 }
 
-func (m *MazeNode) OpenNodes() []*MazeNode {
-	var n []*MazeNode
-
-	if m.open[Up] {
-		n = append(n, m.Node(Up))
-	}
-	if m.open[Down] {
-		n = append(n, m.Node(Down))
-	}
-	if m.open[Left] {
-		n = append(n, m.Node(Left))
-	}
-	if m.open[Right] {
-		n = append(n, m.Node(Right))
+func (m MazeNode) OpenNodes() []MazeNode {
+	var n []MazeNode
+	for dir := Up; dir <= Right; dir++ {
+		if m.IsOpen(dir) {
+			n = append(n, m.Node(dir))
+		}
 	}
 	return n
 }
 
-func (m *MazeNode) NearbyDirs() []int {
+func (m MazeNode) NearbyDirs() []int {
 	var n []int
-
-	if m.y > 0 {
-		n = append(n, Up)
-	}
-	if m.y < m.parent.height-1 {
-		n = append(n, Down)
-	}
-	if m.x > 0 {
-		n = append(n, Left)
-	}
-	if m.x < m.parent.width-1 {
-		n = append(n, Right)
+	for dir := Up; dir <= Right; dir++ {
+		if m.HasNode(dir) {
+			n = append(n, dir)
+		}
 	}
 	return n
 }
 
-func (m *MazeNode) OpenAll() {
+func (m MazeNode) CloseAll() {
+	for dir := Up; dir <= Right; dir++ {
+		m.SetWall(dir)
+	}
+}
+
+func (m MazeNode) OpenAll() {
 	for _, dir := range m.NearbyDirs() {
 		m.ClearWall(dir)
 	}
 }
 
-func (m *MazeNode) Pxy() (x, y int) {
+func (m MazeNode) Color() sdl.Color {
+	return EGAPalette[m.parent.colors[m.index()]]
+}
+
+func (m MazeNode) SetColor(c sdl.Color) {
+	i := m.index()
+	if ci := egaIndex(c); m.parent.colors[i] != ci {
+		m.parent.colors[i] = ci
+		m.parent.markDirty(i)
+	}
+}
+
+func (m MazeNode) Pxy() (x, y int) {
 	return m.x * 16, m.y * 16
 }
 
-func (m *MazeNode) DistanceFrom(n *MazeNode) float64 {
+func (m MazeNode) DistanceFrom(n MazeNode) float64 {
 	x := float64(m.x - n.x)
 	y := float64(m.y - n.y)
 	return math.Sqrt(x*x + y*y)
 }
 
+// Maze stores one byte of wall bits per cell (bit dir set means the wall
+// in that direction is closed) and one EGA palette index per cell.
 type Maze struct {
 	width  int
 	height int
-	nodes  []*MazeNode
+	walls  []uint8
+	colors []uint8
+	algo   *MazeAlgorithm
+	rnd    *rand.Rand
+
+	// genOnly marks a maze that is generated and read but never
+	// regenerated, so the structures regeneration needs are not built
+	genOnly bool
+
+	// posts joins the wall posts (cell corners) connected by closed walls;
+	// nil until needed and again whenever an update could leave it stale
+	posts *postForest
+
+	// forest spans the open passages; carved along with the maze by the
+	// Kruskal family of algorithms, nil for the others and whenever an
+	// update could leave it stale
+	forest *passageForest
+
+	// flow steers mobs towards the player; it goes stale whenever a wall
+	// changes
+	flow *flowField
+
+	// paths caches point to point path queries
+	paths *pathCache
+
+	// runs indexes the straight corridors for line of sight; nil until
+	// first needed
+	runs *corridorIndex
+
+	// layer caches the rendered walls; cells changed since the last
+	// Render are queued in dirty
+	layer      *Image
+	layerValid bool
+	dirty      []int
+	isDirty    []bool
 }
 
-func newMaze(width, height int) *Maze {
+func newMaze(width, height int, algo *MazeAlgorithm) *Maze {
 	m := &Maze{
 		width:  width,
 		height: height,
+		algo:   algo,
 	}
-	braidReset(m)
+	algo.Reset(m)
 	return m
 }
 
+// rng returns the random stream used to carve the maze; unless one was
+// given, it is seeded from the global source the first time it is needed.
+func (m *Maze) rng() *rand.Rand {
+	if m.rnd == nil {
+		m.rnd = rand.New(rand.NewSource(rand.Int63()))
+	}
+	return m.rnd
+}
+
 func (m *Maze) Px() int {
 	return m.width * 16
 }
@@ -222,7 +222,7 @@ func (m *Maze) Py() int {
 	return m.height * 16
 }
 
-func (m *Maze) Node(x, y int) *MazeNode {
+func (m *Maze) Node(x, y int) MazeNode {
 	if y < 0 {
 		y = m.height - 1
 	} else if y == m.height {
@@ -235,50 +235,631 @@ func (m *Maze) Node(x, y int) *MazeNode {
 		x = 0
 	}
 
-	return m.nodes[y*m.width+x]
+	return MazeNode{m, x, y}
+}
+
+func (m *Maze) nodeAt(i int) MazeNode {
+	return MazeNode{m, i % m.width, i / m.width}
+}
+
+// neighbor returns the index of the cell next to i in direction dir,
+// wrapping around the edges the same way Node does.
+func (m *Maze) neighbor(i, dir int) int {
+	x, y := i%m.width, i/m.width
+	p := dirOffsets[dir]
+	x, y = x+int(p.X), y+int(p.Y)
+	if y < 0 {
+		y = m.height - 1
+	} else if y == m.height {
+		y = 0
+	}
+	if x < 0 {
+		x = m.width - 1
+	} else if x == m.width {
+		x = 0
+	}
+	return y*m.width + x
+}
+
+// alloc sizes the cell arrays for a fresh maze, reusing those of the
+// previous one when the size is unchanged, and drops every derived
+// structure.
+func (m *Maze) alloc() {
+	if n := m.width * m.height; len(m.walls) != n {
+		m.walls = make([]uint8, n)
+		m.colors = make([]uint8, n)
+	} else {
+		for i := range m.walls {
+			m.walls[i] = 0
+		}
+	}
+	m.posts = nil
+	m.forest = nil
+	m.flow = nil
+	m.paths = nil
+	m.runs = nil
+	m.layerValid = false
+	m.dirty = m.dirty[:0]
+	m.isDirty = nil
+	c := egaIndex(MazeColor)
+	for i := range m.colors {
+		m.colors[i] = c
+	}
+}
+
+func (m *Maze) isOpen(i, dir int) bool {
+	return m.walls[i]&(1<<uint(dir)) == 0
+}
+
+func (m *Maze) setWall(i, dir int) {
+	if !m.isOpen(i, dir) {
+		return
+	}
+	o := m.neighbor(i, dir)
+	m.walls[i] |= 1 << uint(dir)
+	m.walls[o] |= 1 << uint(opposite(dir))
+	m.markDirty(i)
+	m.markDirty(o)
+	if m.flow != nil {
+		m.flow.valid = false
+	}
+	if m.paths != nil {
+		m.paths.wallClosed(i, o)
+	}
+	if m.runs != nil {
+		m.runs.wallChanged(m, i, dir)
+	}
+	if m.posts != nil {
+		m.posts.close(m, i, dir)
+	}
+	if m.forest != nil && !m.forest.close(i, o, dir) {
+		m.forest = nil
+	}
+}
+
+func (m *Maze) clearWall(i, dir int) {
+	if m.isOpen(i, dir) {
+		return
+	}
+	o := m.neighbor(i, dir)
+	m.walls[i] &^= 1 << uint(dir)
+	m.walls[o] &^= 1 << uint(opposite(dir))
+	m.markDirty(i)
+	m.markDirty(o)
+	if m.flow != nil {
+		m.flow.valid = false
+	}
+	if m.paths != nil {
+		m.paths.wallOpened(m, i, o)
+	}
+	if m.runs != nil {
+		m.runs.wallChanged(m, i, dir)
+	}
+	if m.posts != nil && !m.posts.open(m, i, dir) {
+		m.posts = nil
+	}
+	if m.forest != nil {
+		m.forest.open(i, o, dir)
+	}
+}
+
+// wallEnds returns the two posts at the ends of the wall of cell i in
+// direction dir. Posts are numbered row by row on a (width+1)*(height+1)
+// lattice.
+func (m *Maze) wallEnds(i, dir int) (p, q int) {
+	w := m.width + 1
+	x, y := i%m.width, i/m.width
+	switch dir {
+	case Up:
+		p = y*w + x
+		return p, p + 1
+	case Down:
+		p = (y+1)*w + x
+		return p, p + 1
+	case Left:
+		p = y*w + x
+		return p, p + w
+	case Right:
+		p = y*w + x + 1
+		return p, p + w
+	}
+	panic("unreachable")
+}
+
+// postForest keeps a spanning forest of the closed walls over the posts in
+// a link-cut forest, with every post on the border merged into post 0. In
+// a connected maze the walls form the border loop with trees hanging off
+// it, so with the border merged every closed wall is a forest edge and
+// walls can be closed and opened with a link or a cut each.
+type postForest struct {
+	*linkCutForest
+	edges []uint8 // wall bits of the closed walls that are forest edges
+	extra int     // closed walls that are not forest edges
+}
+
+// postOf returns the forest node of post p.
+func (m *Maze) postOf(p int) int {
+	w := m.width + 1
+	x, y := p%w, p/w
+	if x == 0 || x == m.width || y == 0 || y == m.height {
+		return 0
+	}
+	return p
+}
+
+// wallPosts returns the post forest of the current walls, building it in a
+// single pass if an update has left it stale since it was last used.
+func (m *Maze) wallPosts() *postForest {
+	if m.posts != nil {
+		return m.posts
+	}
+
+	f := &postForest{
+		linkCutForest: newLinkCutForest((m.width + 1) * (m.height + 1)),
+		edges:         make([]uint8, len(m.walls)),
+	}
+	for i := range m.walls {
+		x, y := i%m.width, i/m.width
+		if x < m.width-1 && !m.isOpen(i, Right) {
+			f.close(m, i, Right)
+		}
+		if y < m.height-1 && !m.isOpen(i, Down) {
+			f.close(m, i, Down)
+		}
+	}
+	m.posts = f
+	return f
+}
+
+// close adds the closed wall of cell i in direction dir to the forest;
+// walls on the border are part of the merged border post and skipped.
+func (f *postForest) close(m *Maze, i, dir int) {
+	if !m.nodeAt(i).HasNode(dir) {
+		return
+	}
+	p, q := m.wallEnds(i, dir)
+	p, q = m.postOf(p), m.postOf(q)
+	if f.Connected(p, q) {
+		f.extra++
+		return
+	}
+	f.Link(p, q)
+	o := m.neighbor(i, dir)
+	f.edges[i] |= 1 << uint(dir)
+	f.edges[o] |= 1 << uint(opposite(dir))
+}
+
+// open drops the wall of cell i in direction dir from the forest. It
+// reports false when the forest may no longer span the closed walls and
+// must be rebuilt.
+func (f *postForest) open(m *Maze, i, dir int) bool {
+	if !m.nodeAt(i).HasNode(dir) {
+		return true
+	}
+	if f.edges[i]&(1<<uint(dir)) == 0 {
+		f.extra--
+		return true
+	}
+	p, q := m.wallEnds(i, dir)
+	f.Cut(m.postOf(p), m.postOf(q))
+	o := m.neighbor(i, dir)
+	f.edges[i] &^= 1 << uint(dir)
+	f.edges[o] &^= 1 << uint(opposite(dir))
+	return f.extra == 0
+}
+
+// closingSplits reports whether closing the wall of cell i in direction dir
+// would cut off part of the maze. The maze is planar, so this happens
+// exactly when the wall's two posts are already joined by a chain of walls
+// and the new segment would close a loop around some cells.
+func (m *Maze) closingSplits(i, dir int) bool {
+	posts := m.wallPosts()
+	p, q := m.wallEnds(i, dir)
+	return posts.Connected(m.postOf(p), m.postOf(q))
 }
 
 func (m *Maze) Gen() {
-	braidGen(m, nil)
+	m.algo.Gen(m)
+}
+
+func (m *Maze) RegenSelected(selected []MazeNode) {
+	m.algo.Regen(m, selected)
 }
 
-func (m *Maze) RegenSelected(selected []*MazeNode) {
-	braidRegenSelected(m, selected)
+// cellSpan returns the range of cells [c0, c1] covered by the pixel span
+// [p, p+l), clamped to [0, n).
+func cellSpan(p, l, n int) (c0, c1 int) {
+	c0 = floorDiv(p, 16)
+	c1 = floorDiv(p+l-1, 16)
+	return max(c0, 0), min(c1, n-1)
 }
 
-func (m *Maze) CollideNodes(r sdl.Rect) []*MazeNode {
-	var p []*MazeNode
-	for _, n := range m.nodes {
-		if r.Collide(n.Hitbox()) {
-			p = append(p, n)
+func floorDiv(a, b int) int {
+	q := a / b
+	if a%b != 0 && (a < 0) != (b < 0) {
+		q--
+	}
+	return q
+}
+
+// CollideNodes returns the nodes whose hitbox overlaps r, in row order. The
+// covered cells are computed from r directly, so the cost depends on the
+// size of r rather than the size of the maze.
+func (m *Maze) CollideNodes(r sdl.Rect) []MazeNode {
+	if r.W <= 0 || r.H <= 0 {
+		return nil
+	}
+
+	var p []MazeNode
+	x0, x1 := cellSpan(int(r.X), int(r.W), m.width)
+	y0, y1 := cellSpan(int(r.Y), int(r.H), m.height)
+	for y := y0; y <= y1; y++ {
+		for x := x0; x <= x1; x++ {
+			p = append(p, MazeNode{m, x, y})
 		}
 	}
 	return p
 }
 
-func (m *Maze) Blit() {
-	screen.SetDrawColor(sdl.Color{0x40, 0x40, 0x40, 0xFF})
+// CollideNodesCircle returns the nodes whose hitbox overlaps the circle
+// centered at pixel (cx, cy).
+func (m *Maze) CollideNodesCircle(cx, cy, radius int) []MazeNode {
+	if radius <= 0 {
+		return nil
+	}
+
+	var p []MazeNode
+	x0, x1 := cellSpan(cx-radius, 2*radius+1, m.width)
+	y0, y1 := cellSpan(cy-radius, 2*radius+1, m.height)
+	for y := y0; y <= y1; y++ {
+		// closest point of the hitbox to the center
+		dy := cy - min(max(cy, y*16), y*16+15)
+		for x := x0; x <= x1; x++ {
+			dx := cx - min(max(cx, x*16), x*16+15)
+			if dx*dx+dy*dy < radius*radius {
+				p = append(p, MazeNode{m, x, y})
+			}
+		}
+	}
+	return p
+}
+
+// CollideNodesMask returns the nodes whose center pixel lands on a
+// non-transparent pixel of mask placed at pixel (x, y).
+func (m *Maze) CollideNodesMask(x, y int, mask *image.Alpha) []MazeNode {
+	b := mask.Bounds()
+
+	var p []MazeNode
+	x0, x1 := cellSpan(x, b.Dx(), m.width)
+	y0, y1 := cellSpan(y, b.Dy(), m.height)
+	for cy := y0; cy <= y1; cy++ {
+		for cx := x0; cx <= x1; cx++ {
+			mx := cx*16 + 8 - x + b.Min.X
+			my := cy*16 + 8 - y + b.Min.Y
+			if image.Pt(mx, my).In(b) && mask.AlphaAt(mx, my).A > 0 {
+				p = append(p, MazeNode{m, cx, cy})
+			}
+		}
+	}
+	return p
+}
+
+func (m *Maze) markDirty(i int) {
+	if !m.layerValid || m.isDirty[i] {
+		return
+	}
+	m.isDirty[i] = true
+	m.dirty = append(m.dirty, i)
+}
+
+// Render brings the cached wall layer up to date, repainting only the cells
+// whose walls or color changed since the last call. It binds its own render
+// target, so call it before binding the target Blit draws to.
+func (m *Maze) Render() {
+	if m.layer == nil {
+		m.layer = makeImage(m.Px(), m.Py())
+		m.layerValid = false
+	}
+	if m.layerValid && len(m.dirty) == 0 {
+		return
+	}
+
+	paint := mazeRenderers[*mazeRender]
+	if *mazeRender == "tile" && wallAtlas == nil {
+		wallAtlas = makeWallAtlas()
+	}
+	m.layer.Bind()
+	if !m.layerValid {
+		for i := range m.walls {
+			paint(m, i)
+		}
+		m.isDirty = make([]bool, len(m.walls))
+		m.layerValid = true
+	} else {
+		for _, i := range m.dirty {
+			paint(m, i)
+			m.isDirty[i] = false
+		}
+	}
+	m.dirty = m.dirty[:0]
+	m.layer.Unbind()
+}
+
+// mazeRenderers paint a single cell, background included, into the current
+// render target; -mazerender picks one.
+var mazeRenderers = map[string]func(m *Maze, i int){
+	"line": paintCellLines,
+	"tile": paintCellTile,
+}
+
+func paintCellLines(m *Maze, i int) {
+	x, y := m.nodeAt(i).Pxy()
+	screen.SetDrawColor(MazeBGColor)
+	screen.FillRect(&sdl.Rect{int32(x), int32(y), 16, 16})
+	drawWalls(x, y, m.walls[i], EGAPalette[m.colors[i]])
+}
+
+func drawWalls(x, y int, walls uint8, c sdl.Color) {
+	screen.SetDrawColor(c)
+	if walls&(1<<Up) != 0 {
+		screen.DrawLine(x, y, x+15, y)
+	}
+	if walls&(1<<Down) != 0 {
+		screen.DrawLine(x, y+15, x+15, y+15)
+	}
+	if walls&(1<<Left) != 0 {
+		screen.DrawLine(x, y, x, y+15)
+	}
+	if walls&(1<<Right) != 0 {
+		screen.DrawLine(x+15, y, x+15, y+15)
+	}
+}
+
+// wallAtlas holds every cell as it can appear: one 16x16 tile for each of
+// the 16 wall masks (columns) in each EGA color (rows). It is shared by all
+// mazes and built by the first Render that uses the tile renderer.
+var wallAtlas *Image
+
+func paintCellTile(m *Maze, i int) {
+	// consecutive copies from the one atlas texture are merged into a
+	// single draw call by the renderer's command batching
+	x, y := m.nodeAt(i).Pxy()
+	src := sdl.Rect{int32(m.walls[i]) * 16, int32(m.colors[i]) * 16, 16, 16}
+	wallAtlas.BlitArea(x, y, src)
+}
+
+func makeWallAtlas() *Image {
+	a := makeImage(16*16, 16*len(EGAPalette))
+	a.Bind()
+	screen.SetDrawColor(MazeBGColor)
 	screen.FillRect(nil)
+	for ci, c := range EGAPalette {
+		for w := 0; w < 16; w++ {
+			drawWalls(w*16, ci*16, uint8(w), c)
+		}
+	}
+	a.Unbind()
+	return a
+}
+
+// Blit copies the wall layer prepared by Render to the current target.
+func (m *Maze) Blit() {
+	m.layer.Blit(0, 0)
+}
 
-	wp := m.width * 16
-	hp := m.height * 16
-	screen.SetDrawColor(MazeColor)
-	screen.DrawRect(&sdl.Rect{0, 0, int32(wp), int32(hp)})
+func (m *Maze) Free() {
+	if m.layer != nil {
+		m.layer.Free()
+		m.layer = nil
+	}
+}
+
+// Kruskal: start with every wall closed and every cell in its own set,
+// then visit the walls between neighbouring cells in random order and open
+// each one that joins two different sets. The sets are kept in a
+// disjoint-set forest, so the whole pass is near-linear in the cell count.
+
+type disjointSet struct {
+	parent []int32
+	rank   []uint8
+}
+
+func newDisjointSet(n int) *disjointSet {
+	d := &disjointSet{
+		parent: make([]int32, n),
+		rank:   make([]uint8, n),
+	}
+	for i := range d.parent {
+		d.parent[i] = int32(i)
+	}
+	return d
+}
 
-	for _, n := range m.nodes {
-		x, y := n.Pxy()
-		screen.SetDrawColor(n.color)
-		if !n.IsOpen(Up) {
-			screen.DrawLine(x, y, x+15, y)
+func (d *disjointSet) Find(x int) int {
+	for int(d.parent[x]) != x {
+		d.parent[x] = d.parent[d.parent[x]]
+		x = int(d.parent[x])
+	}
+	return x
+}
+
+// Union merges the sets holding x and y and reports whether they were
+// different sets.
+func (d *disjointSet) Union(x, y int) bool {
+	x, y = d.Find(x), d.Find(y)
+	if x == y {
+		return false
+	}
+	switch {
+	case d.rank[x] < d.rank[y]:
+		d.parent[x] = int32(y)
+	case d.rank[x] > d.rank[y]:
+		d.parent[y] = int32(x)
+	default:
+		d.parent[y] = int32(x)
+		d.rank[x]++
+	}
+	return true
+}
+
+// kruskalReset closes every wall and, unless the maze is never to be
+// regenerated, starts an empty passage forest, so the passages are linked
+// into it as they are carved and the first regeneration finds it ready.
+func kruskalReset(m *Maze) {
+	m.alloc()
+	for i := range m.walls {
+		m.walls[i] = 1<<Up | 1<<Down | 1<<Left | 1<<Right
+	}
+	if !m.genOnly {
+		m.forest = newPassageForest(len(m.walls))
+	}
+}
+
+// kruskalGen carves a spanning tree through the whole maze. Cells already
+// joined by open passages start out in the same set.
+func kruskalGen(m *Maze) {
+	set := newDisjointSet(len(m.walls))
+
+	// each candidate wall is packed as cell<<1 | 0 for right, 1 for down
+	var edges []int
+	sets := len(m.walls)
+	for i := range m.walls {
+		x, y := i%m.width, i/m.width
+		for k, dir := range [...]int{Right, Down} {
+			if (dir == Right && x == m.width-1) || (dir == Down && y == m.height-1) {
+				continue
+			}
+			if m.isOpen(i, dir) {
+				if set.Union(i, m.neighbor(i, dir)) {
+					sets--
+				}
+				continue
+			}
+			edges = append(edges, i<<1|k)
 		}
-		if !n.IsOpen(Down) {
-			screen.DrawLine(x, y+15, x+15, y+15)
+	}
+
+	for i := len(edges) - 1; i >= 1; i-- {
+		j := m.rng().Intn(i + 1)
+		edges[i], edges[j] = edges[j], edges[i]
+	}
+
+	for _, e := range edges {
+		if sets == 1 {
+			break
 		}
-		if !n.IsOpen(Left) {
-			screen.DrawLine(x, y, x, y+15)
+		i, dir := e>>1, Right
+		if e&1 != 0 {
+			dir = Down
 		}
-		if !n.IsOpen(Right) {
-			screen.DrawLine(x+15, y, x+15, y+15)
+		if set.Union(i, m.neighbor(i, dir)) {
+			m.clearWall(i, dir)
+			sets--
+		}
+	}
+}
+
+// passageForest keeps a spanning forest of the open passages in a link-cut
+// tree, so connectivity between two cells can be asked without a search.
+// In a perfect maze the forest is exactly the set of open passages.
+type passageForest struct {
+	*linkCutForest
+	edges []uint8 // wall bits of the passages that are forest edges
+	extra int     // open passages that are not forest edges
+}
+
+func (m *Maze) passageForest() *passageForest {
+	if m.forest != nil {
+		return m.forest
+	}
+
+	f := newPassageForest(len(m.walls))
+	for i := range m.walls {
+		x, y := i%m.width, i/m.width
+		if x < m.width-1 && m.isOpen(i, Right) {
+			f.open(i, i+1, Right)
+		}
+		if y < m.height-1 && m.isOpen(i, Down) {
+			f.open(i, i+m.width, Down)
+		}
+	}
+	m.forest = f
+	return f
+}
+
+func newPassageForest(n int) *passageForest {
+	return &passageForest{
+		linkCutForest: newLinkCutForest(n),
+		edges:         make([]uint8, n),
+	}
+}
+
+func (f *passageForest) open(i, o, dir int) {
+	if f.Connected(i, o) {
+		f.extra++
+		return
+	}
+	f.Link(i, o)
+	f.edges[i] |= 1 << uint(dir)
+	f.edges[o] |= 1 << uint(opposite(dir))
+}
+
+// close drops the passage between i and o from the forest. It reports false
+// when the forest may no longer span the open passages and must be rebuilt.
+func (f *passageForest) close(i, o, dir int) bool {
+	if f.edges[i]&(1<<uint(dir)) == 0 {
+		f.extra--
+		return true
+	}
+	f.Cut(i, o)
+	f.edges[i] &^= 1 << uint(dir)
+	f.edges[o] &^= 1 << uint(opposite(dir))
+	return f.extra == 0
+}
+
+// kruskalRegenSelected walls the selected nodes off and carves them back
+// into the maze. The pieces left behind are told apart through the passage
+// forest, so the cost depends on the size of the selection rather than the
+// size of the maze once the forest exists.
+func kruskalRegenSelected(m *Maze, selected []MazeNode) {
+	in := make(map[int]bool, len(selected))
+	var cells []int
+	for _, n := range selected {
+		i := n.index()
+		n.CloseAll()
+		if !in[i] {
+			in[i] = true
+			cells = append(cells, i)
+		}
+	}
+
+	type wall struct {
+		cell int
+		dir  int
+	}
+	var walls []wall
+	for _, i := range cells {
+		n := m.nodeAt(i)
+		for dir := Up; dir <= Right; dir++ {
+			if !n.HasNode(dir) {
+				continue
+			}
+			o := m.neighbor(i, dir)
+			if in[o] && (dir == Up || dir == Left) {
+				continue
+			}
+			walls = append(walls, wall{i, dir})
+		}
+	}
+	for i := len(walls) - 1; i >= 1; i-- {
+		j := m.rng().Intn(i + 1)
+		walls[i], walls[j] = walls[j], walls[i]
+	}
+
+	f := m.passageForest()
+	for _, w := range walls {
+		if !f.Connected(w.cell, m.neighbor(w.cell, w.dir)) {
+			m.clearWall(w.cell, w.dir)
 		}
 	}
 }
@@ -296,113 +877,102 @@ func (m *Maze) Blit() {
 // if it also wouldn't cause an isolated section.
 
 func braidReset(m *Maze) {
-	m.nodes = nil
-	id := 0
+	m.alloc()
 	for y := 0; y < m.height; y++ {
 		for x := 0; x < m.width; x++ {
-			n := newMazeNode(id, x, y, m)
-			n.open[Up] = y != 0
-			n.open[Down] = y != m.height-1
-			n.open[Left] = x != 0
-			n.open[Right] = x != m.width-1
-			id++
-			m.nodes = append(m.nodes, n)
+			i := y*m.width + x
+			if y == 0 {
+				m.walls[i] |= 1 << Up
+			}
+			if y == m.height-1 {
+				m.walls[i] |= 1 << Down
+			}
+			if x == 0 {
+				m.walls[i] |= 1 << Left
+			}
+			if x == m.width-1 {
+				m.walls[i] |= 1 << Right
+			}
 		}
 	}
 }
 
-func braidGen(m *Maze, nodes []*MazeNode) {
-	if nodes == nil {
-		nodes = m.nodes
-	}
-
+func braidGen(m *Maze, nodes []MazeNode) {
 	type wall struct {
-		node *MazeNode
+		node int
 		dir  int
 	}
 	var walls []wall
-	for _, n := range nodes {
-		for i, o := range n.open {
-			if !o {
-				continue
+	addWalls := func(i int) {
+		for dir := Up; dir <= Right; dir++ {
+			if m.isOpen(i, dir) {
+				walls = append(walls, wall{i, dir})
 			}
-			walls = append(walls, wall{n, i})
+		}
+	}
+	if nodes == nil {
+		for i := range m.walls {
+			addWalls(i)
+		}
+	} else {
+		for _, n := range nodes {
+			addWalls(n.index())
 		}
 	}
 	for i := len(walls) - 1; i >= 1; i-- {
-		j := rand.Intn(i + 1)
+		j := m.rng().Intn(i + 1)
 		walls[i], walls[j] = walls[j], walls[i]
 	}
 
+	// a whole maze only ever closes walls, so a union-find of the posts is
+	// enough and cheaper than the forest, which is built once at the end
+	// for the regenerations to come
+	splits := m.closingSplits
+	if nodes == nil {
+		m.posts = nil
+		posts := newDisjointSet((m.width + 1) * (m.height + 1))
+		for i := range m.walls {
+			for dir := Up; dir <= Right; dir++ {
+				if !m.isOpen(i, dir) {
+					posts.Union(m.wallEnds(i, dir))
+				}
+			}
+		}
+		splits = func(i, dir int) bool {
+			p, q := m.wallEnds(i, dir)
+			if posts.Find(p) == posts.Find(q) {
+				return true
+			}
+			posts.Union(p, q)
+			return false
+		}
+		if !m.genOnly {
+			defer m.wallPosts()
+		}
+	}
+
 	for _, w := range walls {
 		n := w.node
-		if !n.IsOpen(w.dir) {
+		if !m.isOpen(n, w.dir) {
 			continue
 		}
-		if n.WallCount() >= 2 {
+		if bits.OnesCount8(m.walls[n]) >= 2 {
 			continue
 		}
 
-		o := n.Node(w.dir)
-		if o.WallCount() >= 2 {
+		o := m.neighbor(n, w.dir)
+		if bits.OnesCount8(m.walls[o]) >= 2 {
 			continue
 		}
-		if !braidConnected(n, o) {
+		if splits(n, w.dir) {
 			continue
 		}
 
-		n.SetWall(w.dir)
-	}
-}
-
-type braidSet map[*MazeNode]*MazeNode
-
-func (s braidSet) Add(nodes ...*MazeNode) {
-	for _, n := range nodes {
-		s[n] = n
-	}
-}
-
-func (s braidSet) Pop() *MazeNode {
-	for k, v := range s {
-		delete(s, k)
-		return v
-	}
-	return nil
-}
-
-func braidConnected(f, s *MazeNode) bool {
-	seen := make(braidSet)
-	queue := make(braidSet)
-
-	seen.Add(f, s)
-	for _, x := range f.OpenNodes() {
-		if x != f && x != s {
-			queue.Add(x)
-		}
-	}
-
-	for {
-		n := queue.Pop()
-		if n == nil {
-			break
-		}
-		seen.Add(n)
-
-		for _, x := range n.OpenNodes() {
-			if x == s {
-				return true
-			}
-			if seen[x] != nil {
-				continue
-			}
-			queue.Add(x)
-		}
+		m.setWall(n, w.dir)
 	}
-	return false
 }
 
-func braidRegenSelected(m *Maze, selected []*MazeNode) {
+func braidRegenSelected(m *Maze, selected []MazeNode) {
 	for _, n := range selected {
 		n.OpenAll()
 	}
@@ -0,0 +1,438 @@
+package main
+
+import (
+	"encoding/binary"
+	"errors"
+	"math/rand"
+	"os"
+	"path/filepath"
+	"testing"
+
+	"github.com/qeedquan/go-media/sdl"
+)
+
+func newTestMaze(algo string, w, h int, seed int64) *Maze {
+	m := &Maze{width: w, height: h, algo: mazeAlgorithms[algo]}
+	m.rnd = rand.New(rand.NewSource(seed))
+	m.algo.Reset(m)
+	m.algo.Gen(m)
+	return m
+}
+
+// regenRandom regenerates a random patch of m the size of the mouse
+// mutator.
+func regenRandom(m *Maze, rnd *rand.Rand) {
+	r := sdl.Rect{int32(rnd.Intn(m.Px())) - 32, int32(rnd.Intn(m.Py())) - 32, 64, 64}
+	m.RegenSelected(m.CollideNodes(r))
+}
+
+func TestPostForestMatchesRebuild(t *testing.T) {
+	m := newTestMaze("braid", 30, 20, 1)
+	rnd := rand.New(rand.NewSource(2))
+	posts := m.posts
+	if posts == nil {
+		t.Fatal("braid generation left no post forest")
+	}
+	for n := 0; n < 50; n++ {
+		regenRandom(m, rnd)
+		if m.posts != posts {
+			t.Fatal("regeneration rebuilt the post forest")
+		}
+
+		fresh := newDisjointSet((m.width + 1) * (m.height + 1))
+		for i := range m.walls {
+			for dir := Up; dir <= Right; dir++ {
+				if !m.isOpen(i, dir) {
+					p, q := m.wallEnds(i, dir)
+					fresh.Union(m.postOf(p), m.postOf(q))
+				}
+			}
+		}
+		for k := 0; k < 200; k++ {
+			p, q := rnd.Intn(len(posts.par)), rnd.Intn(len(posts.par))
+			p, q = m.postOf(p), m.postOf(q)
+			if posts.Connected(p, q) != (fresh.Find(p) == fresh.Find(q)) {
+				t.Fatalf("regeneration %d: posts %d and %d disagree with a rebuild", n, p, q)
+			}
+		}
+		if err := m.Validate(m.Node(0, 0), m.Node(m.width-1, m.height-1)); err != nil {
+			t.Fatal(err)
+		}
+	}
+}
+
+func TestPassageForestMatchesRebuild(t *testing.T) {
+	for _, algo := range []string{"kruskal", "backtracker", "wilson", "eller"} {
+		m := newTestMaze(algo, 30, 20, 3)
+		rnd := rand.New(rand.NewSource(4))
+		forest := m.forest
+		if forest == nil {
+			t.Fatalf("%s: generation left no passage forest", algo)
+		}
+		for n := 0; n < 50; n++ {
+			// close a few walls as well, so cuts that split the maze and
+			// later rejoin it are covered
+			for k := 0; k < 3; k++ {
+				m.nodeAt(rnd.Intn(len(m.walls))).SetWall(rnd.Intn(4))
+			}
+			regenRandom(m, rnd)
+			if m.forest != forest {
+				t.Fatalf("%s: regeneration rebuilt the passage forest", algo)
+			}
+
+			fresh := newDisjointSet(len(m.walls))
+			for i := range m.walls {
+				for dir := Up; dir <= Right; dir++ {
+					if m.isOpen(i, dir) {
+						fresh.Union(i, m.neighbor(i, dir))
+					}
+				}
+			}
+			for k := 0; k < 200; k++ {
+				a, b := rnd.Intn(len(m.walls)), rnd.Intn(len(m.walls))
+				if forest.Connected(a, b) != (fresh.Find(a) == fresh.Find(b)) {
+					t.Fatalf("%s, regeneration %d: cells %d and %d disagree with a rebuild", algo, n, a, b)
+				}
+			}
+		}
+	}
+}
+
+func TestWriteEllerMaze(t *testing.T) {
+	name := filepath.Join(t.TempDir(), "eller.maze")
+	f, err := os.Create(name)
+	if err != nil {
+		t.Fatal(err)
+	}
+	err = writeEllerMaze(f, 37, 21, rand.New(rand.NewSource(5)))
+	if xerr := f.Close(); err == nil {
+		err = xerr
+	}
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	m, err := loadMaze(name, mazeAlgorithms["eller"])
+	if err != nil {
+		t.Fatal(err)
+	}
+	if err := m.Validate(m.Node(0, 0), m.Node(m.width-1, m.height-1)); err != nil {
+		t.Fatal(err)
+	}
+}
+
+// failingWriter fails every write after the first n.
+type failingWriter struct {
+	n, writes int
+}
+
+var errWriteFailed = errors.New("write failed")
+
+func (w *failingWriter) Write(b []byte) (int, error) {
+	if w.writes++; w.writes > w.n {
+		return 0, errWriteFailed
+	}
+	return len(b), nil
+}
+
+func TestWriteEllerMazeStopsOnError(t *testing.T) {
+	w := &failingWriter{n: 2}
+	err := writeEllerMaze(w, 1000, 1000000, rand.New(rand.NewSource(6)))
+	if err != errWriteFailed {
+		t.Fatalf("got error %v, want %v", err, errWriteFailed)
+	}
+	if w.writes != w.n+1 {
+		t.Fatalf("%d writes after the first failure", w.writes-w.n-1)
+	}
+}
+
+func TestChunkedMazeIsOpen(t *testing.T) {
+	w := newChunkedMaze(7, 8, 4, mazeAlgorithms["kruskal"])
+	open := make(map[[3]int]bool)
+	for y := -12; y < 12; y++ {
+		for x := -12; x < 12; x++ {
+			open[[3]int{x, y, Right}] = w.IsOpen(x, y, Right)
+			open[[3]int{x, y, Down}] = w.IsOpen(x, y, Down)
+			if w.IsOpen(x, y, Right) != w.IsOpen(x+1, y, Left) {
+				t.Fatalf("wall between (%d, %d) and (%d, %d) differs from either side", x, y, x+1, y)
+			}
+			if w.IsOpen(x, y, Down) != w.IsOpen(x, y+1, Up) {
+				t.Fatalf("wall between (%d, %d) and (%d, %d) differs from either side", x, y, x, y+1)
+			}
+		}
+	}
+	if w.evicted == 0 {
+		t.Fatal("no chunk was evicted")
+	}
+
+	// evicted chunks must come back as they were
+	for y := 11; y >= -12; y-- {
+		for x := 11; x >= -12; x-- {
+			if w.IsOpen(x, y, Right) != open[[3]int{x, y, Right}] || w.IsOpen(x, y, Down) != open[[3]int{x, y, Down}] {
+				t.Fatalf("cell (%d, %d) changed after its chunk was evicted", x, y)
+			}
+		}
+	}
+}
+
+// toggleRandomWall opens or closes a random wall away from the border.
+func toggleRandomWall(m *Maze, rnd *rand.Rand) {
+	for {
+		x, y, dir := rnd.Intn(m.width), rnd.Intn(m.height), rnd.Intn(4)
+		if dir == Left && x == 0 || dir == Right && x == m.width-1 ||
+			dir == Up && y == 0 || dir == Down && y == m.height-1 {
+			continue
+		}
+		n := m.Node(x, y)
+		if n.IsOpen(dir) {
+			n.SetWall(dir)
+		} else {
+			n.ClearWall(dir)
+		}
+		return
+	}
+}
+
+// walkSees is the corridor walk the index replaced: step from (x, y)
+// towards dir until a wall, looking for a cell of [x0, x1] x [y0, y1].
+func walkSees(m *Maze, x, y, dir, x0, y0, x1, y1 int) bool {
+	d := dirOffsets[dir]
+	for {
+		if x0 <= x && x <= x1 && y0 <= y && y <= y1 {
+			return true
+		}
+		if !m.isOpen(y*m.width+x, dir) {
+			return false
+		}
+		x += int(d.X)
+		y += int(d.Y)
+	}
+}
+
+func TestCorridorIndexMatchesRebuild(t *testing.T) {
+	m := newTestMaze("braid", 25, 15, 8)
+	rnd := rand.New(rand.NewSource(9))
+	runs := m.corridors()
+	for n := 0; n < 300; n++ {
+		if n%20 == 0 {
+			regenRandom(m, rnd)
+		} else {
+			toggleRandomWall(m, rnd)
+		}
+		if m.runs != runs {
+			t.Fatal("a wall change rebuilt the corridor index")
+		}
+
+		m.runs = nil
+		fresh := m.corridors()
+		m.runs = runs
+		for axis := range fresh.first {
+			for i := range m.walls {
+				if runs.first[axis][i] != fresh.first[axis][i] || runs.last[axis][i] != fresh.last[axis][i] {
+					t.Fatalf("change %d: run of cell %d along axis %d is [%d, %d], a rebuild has [%d, %d]",
+						n, i, axis, runs.first[axis][i], runs.last[axis][i], fresh.first[axis][i], fresh.last[axis][i])
+				}
+			}
+		}
+
+		for k := 0; k < 50; k++ {
+			x, y, dir := rnd.Intn(m.width), rnd.Intn(m.height), rnd.Intn(4)
+			x0, y0 := rnd.Intn(m.width), rnd.Intn(m.height)
+			x1, y1 := x0+rnd.Intn(2), y0+rnd.Intn(2)
+			if m.CorridorSees(x, y, dir, x0, y0, x1, y1) != walkSees(m, x, y, dir, x0, y0, x1, y1) {
+				t.Fatalf("change %d: looking %d from (%d, %d) at [%d, %d]x[%d, %d] disagrees with a walk",
+					n, dir, x, y, x0, x1, y0, y1)
+			}
+		}
+	}
+}
+
+// bfsDist returns the number of steps from cell a to every cell, -1 where
+// it cannot be reached.
+func bfsDist(m *Maze, a int) []int {
+	dist := make([]int, len(m.walls))
+	for i := range dist {
+		dist[i] = -1
+	}
+	dist[a] = 0
+	queue := []int{a}
+	for len(queue) > 0 {
+		i := queue[0]
+		queue = queue[1:]
+		for dir := Up; dir <= Right; dir++ {
+			if o := m.neighbor(i, dir); m.isOpen(i, dir) && dist[o] < 0 {
+				dist[o] = dist[i] + 1
+				queue = append(queue, o)
+			}
+		}
+	}
+	return dist
+}
+
+// passage reports whether a and b are neighbors with no wall between them.
+func passage(a, b MazeNode) bool {
+	for dir := Up; dir <= Right; dir++ {
+		if a.IsOpen(dir) && a.Node(dir) == b {
+			return true
+		}
+	}
+	return false
+}
+
+func TestPathCacheMatchesSearch(t *testing.T) {
+	for _, algo := range []string{"kruskal", "braid"} {
+		m := newTestMaze(algo, 20, 20, 10)
+		rnd := rand.New(rand.NewSource(11))
+		var pairs [][2]int
+		for k := 0; k < 40; k++ {
+			pairs = append(pairs, [2]int{rnd.Intn(len(m.walls)), rnd.Intn(len(m.walls))})
+		}
+		for n := 0; n < 200; n++ {
+			if n%20 == 0 {
+				regenRandom(m, rnd)
+			} else {
+				toggleRandomWall(m, rnd)
+			}
+			for _, p := range pairs {
+				path := m.Path(m.nodeAt(p[0]), m.nodeAt(p[1]))
+				if want := bfsDist(m, p[0])[p[1]]; len(path)-1 != want {
+					t.Fatalf("%s, change %d: path from %d to %d has %d steps, want %d", algo, n, p[0], p[1], len(path)-1, want)
+				}
+				for j := 1; j < len(path); j++ {
+					if !passage(path[j-1], path[j]) {
+						t.Fatalf("%s, change %d: path from %d to %d goes through a wall", algo, n, p[0], p[1])
+					}
+				}
+			}
+		}
+	}
+}
+
+func TestCrowdStaysInPassages(t *testing.T) {
+	m := newTestMaze("braid", 30, 20, 12)
+	rnd := rand.New(rand.NewSource(13))
+	sprites := &mobSprites{
+		good:        make([]*Image, len(SpriteColors)),
+		bad:         make([]*Image, len(BadColors)),
+		exclamation: &Image{},
+	}
+	c := newMobCrowd(m, rnd, rnd, sprites)
+	for k := 0; k < 300; k++ {
+		c.Add(rnd.Intn(m.width)*16, rnd.Intn(m.height)*16, k%3 == 0)
+	}
+	if c.sprites != sprites {
+		t.Fatal("crowd does not draw with the sprites it was made with")
+	}
+	for k := 0; k < c.Len(); k++ {
+		if int(c.good[k]) >= len(sprites.good) || int(c.bad[k]) >= len(sprites.bad) {
+			t.Fatalf("mob %d has sprites %d and %d out of range", k, c.good[k], c.bad[k])
+		}
+	}
+
+	var px, py int
+	chasing := 0
+	for f := 0; f < 600; f++ {
+		if f%40 == 0 {
+			px, py = rnd.Intn(m.width)*16, rnd.Intn(m.height)*16
+		}
+		c.Update(px, py)
+		for k := 0; k < c.Len(); k++ {
+			v := c.Mob(k)
+			x, y := v.Pos()
+			if x < 0 || y < 0 || x > m.Px()-16 || y > m.Py()-16 {
+				t.Fatalf("frame %d: mob %d left the maze at (%d, %d)", f, k, x, y)
+			}
+			// between two cells, the mob must be in the passage joining them
+			n := m.Node(x/16, y/16)
+			if x%16 != 0 && y%16 != 0 ||
+				x%16 != 0 && !n.IsOpen(Right) || y%16 != 0 && !n.IsOpen(Down) {
+				t.Fatalf("frame %d: mob %d is in a wall at (%d, %d)", f, k, x, y)
+			}
+			if v.State() == "chase" {
+				chasing++
+			}
+		}
+	}
+	if chasing == 0 {
+		t.Fatal("no mob ever chased the player")
+	}
+}
+
+func TestMazeBatch(t *testing.T) {
+	for _, algo := range []string{"braid", "kruskal", "backtracker", "wilson", "eller"} {
+		b := newMazeBatch(6, 17, 11, mazeAlgorithms[algo], 20)
+		for k := 0; k < b.n; k++ {
+			m := b.Maze(k, mazeAlgorithms[algo])
+			if err := m.Validate(m.Node(0, 0), m.Node(m.width-1, m.height-1)); err != nil {
+				t.Fatalf("%s maze %d: %v", algo, k, err)
+			}
+			if want := newTestMaze(algo, 17, 11, 20+int64(k)); string(m.walls) != string(want.walls) {
+				t.Fatalf("%s maze %d differs from the one generated on its own", algo, k)
+			}
+
+			// the decoded maze regenerates like any other
+			rnd := rand.New(rand.NewSource(int64(k)))
+			for n := 0; n < 5; n++ {
+				regenRandom(m, rnd)
+				if err := m.Validate(m.Node(0, 0), m.Node(m.width-1, m.height-1)); err != nil {
+					t.Fatalf("%s maze %d, regeneration %d: %v", algo, k, n, err)
+				}
+			}
+		}
+	}
+}
+
+func TestSaveLoadMaze(t *testing.T) {
+	m := newTestMaze("braid", 23, 17, 14)
+	m.Node(3, 4).SetColor(BrightRed)
+	name := filepath.Join(t.TempDir(), "braid.maze")
+	if err := m.Save(name); err != nil {
+		t.Fatal(err)
+	}
+
+	h, err := readMazeHeader(name)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if h.width != m.width || h.height != m.height {
+		t.Fatalf("header says %dx%d, want %dx%d", h.width, h.height, m.width, m.height)
+	}
+	l, err := loadMaze(name, mazeAlgorithms["braid"])
+	if err != nil {
+		t.Fatal(err)
+	}
+	if string(l.walls) != string(m.walls) || string(l.colors) != string(m.colors) {
+		t.Fatal("loaded maze differs from the one saved")
+	}
+	regenRandom(l, rand.New(rand.NewSource(15)))
+	if err := l.Validate(l.Node(0, 0), l.Node(l.width-1, l.height-1)); err != nil {
+		t.Fatal(err)
+	}
+}
+
+func TestLoadMazeRejectsBadHeaders(t *testing.T) {
+	dir := t.TempDir()
+	for _, c := range []struct {
+		name          string
+		width, height uint32
+		body          int
+	}{
+		{"huge", 1 << 31, 1 << 31, 64},
+		{"overflow", 1<<32 - 1, 1<<32 - 1, 64},
+		{"too many cells", 1 << 24, 1 << 24, 64},
+		{"empty", 0, 5, 64},
+		{"truncated", 100, 100, 64},
+	} {
+		b := mazeHeader{}.encode()
+		binary.LittleEndian.PutUint32(b[8:], c.width)
+		binary.LittleEndian.PutUint32(b[12:], c.height)
+		b = append(b, make([]byte, c.body)...)
+		name := filepath.Join(dir, c.name+".maze")
+		if err := os.WriteFile(name, b, 0644); err != nil {
+			t.Fatal(err)
+		}
+		if _, err := loadMaze(name, mazeAlgorithms["kruskal"]); err == nil {
+			t.Errorf("%s: loaded a %dx%d maze from %d bytes", c.name, c.width, c.height, len(b))
+		}
+	}
+}
@@ -0,0 +1,291 @@
+package main
+
+import (
+	"math/rand"
+	"sort"
+)
+
+// MazeAlgorithm is a maze generation strategy. Reset lays out the grid a
+// fresh maze starts from, Gen carves the whole maze and Regen carves the
+// selected nodes back into an existing maze. Prepare builds what Regen
+// keeps between regenerations for a maze whose walls were set directly,
+// such as one loaded from a file. NoDeadEnds is set for algorithms that
+// never leave a cell with three walls.
+type MazeAlgorithm struct {
+	Name       string
+	Reset      func(m *Maze)
+	Gen        func(m *Maze)
+	Regen      func(m *Maze, selected []MazeNode)
+	Prepare    func(m *Maze)
+	NoDeadEnds bool
+}
+
+var mazeAlgorithms = make(map[string]*MazeAlgorithm)
+
+func registerMazeAlgorithm(a *MazeAlgorithm) {
+	if _, found := mazeAlgorithms[a.Name]; found {
+		panic("maze algorithm registered twice: " + a.Name)
+	}
+	mazeAlgorithms[a.Name] = a
+}
+
+// mazeAlgorithmNames returns the registered algorithm names in sorted order.
+func mazeAlgorithmNames() []string {
+	var p []string
+	for name := range mazeAlgorithms {
+		p = append(p, name)
+	}
+	sort.Strings(p)
+	return p
+}
+
+// kruskalPrepare rebuilds the passage forest from the current walls.
+func kruskalPrepare(m *Maze) {
+	m.forest = nil
+	m.passageForest()
+}
+
+// The algorithms other than braid all produce perfect mazes, so they share
+// the Kruskal reset and the forest based Kruskal regeneration.
+func init() {
+	registerMazeAlgorithm(&MazeAlgorithm{
+		Name:       "braid",
+		Reset:      braidReset,
+		Gen:        func(m *Maze) { braidGen(m, nil) },
+		Regen:      braidRegenSelected,
+		Prepare:    func(m *Maze) { m.wallPosts() },
+		NoDeadEnds: true,
+	})
+	registerMazeAlgorithm(&MazeAlgorithm{
+		Name:    "kruskal",
+		Reset:   kruskalReset,
+		Gen:     kruskalGen,
+		Regen:   kruskalRegenSelected,
+		Prepare: kruskalPrepare,
+	})
+	registerMazeAlgorithm(&MazeAlgorithm{
+		Name:    "backtracker",
+		Reset:   kruskalReset,
+		Gen:     backtrackerGen,
+		Regen:   kruskalRegenSelected,
+		Prepare: kruskalPrepare,
+	})
+	registerMazeAlgorithm(&MazeAlgorithm{
+		Name:    "wilson",
+		Reset:   kruskalReset,
+		Gen:     wilsonGen,
+		Regen:   kruskalRegenSelected,
+		Prepare: kruskalPrepare,
+	})
+	registerMazeAlgorithm(&MazeAlgorithm{
+		Name:    "eller",
+		Reset:   kruskalReset,
+		Gen:     ellerGen,
+		Regen:   kruskalRegenSelected,
+		Prepare: kruskalPrepare,
+	})
+}
+
+// carveDirs returns the directions from cell i that lead to another cell
+// of the maze rather than across its border.
+func (m *Maze) carveDirs(i int, dirs []int) []int {
+	dirs = dirs[:0]
+	n := m.nodeAt(i)
+	for dir := Up; dir <= Right; dir++ {
+		if n.HasNode(dir) {
+			dirs = append(dirs, dir)
+		}
+	}
+	return dirs
+}
+
+// Recursive backtracker: walk from cell to random unvisited neighbour,
+// opening the wall between them, and back up when stuck. The recursion is
+// kept on an explicit stack.
+func backtrackerGen(m *Maze) {
+	var (
+		stack []int
+		dirs  []int
+		open  []int
+	)
+	seen := make([]bool, len(m.walls))
+	for start := range m.walls {
+		if seen[start] {
+			continue
+		}
+		seen[start] = true
+		stack = append(stack[:0], start)
+		for len(stack) > 0 {
+			i := stack[len(stack)-1]
+			open = open[:0]
+			for _, dir := range m.carveDirs(i, dirs) {
+				if !seen[m.neighbor(i, dir)] {
+					open = append(open, dir)
+				}
+			}
+			if len(open) == 0 {
+				stack = stack[:len(stack)-1]
+				continue
+			}
+
+			dir := open[m.rng().Intn(len(open))]
+			o := m.neighbor(i, dir)
+			m.clearWall(i, dir)
+			seen[o] = true
+			stack = append(stack, o)
+		}
+	}
+}
+
+// Wilson: grow the maze from one cell with loop-erased random walks. Each
+// walk starts at a cell outside the maze and wanders until it hits the
+// maze; only the last exit taken from every cell is remembered, which
+// erases the loops, and the resulting path is carved in. The mazes are
+// uniformly chosen among all spanning trees.
+func wilsonGen(m *Maze) {
+	const outside, inside = 0, 1
+	state := make([]uint8, len(m.walls))
+	exit := make([]uint8, len(m.walls))
+	state[m.rng().Intn(len(m.walls))] = inside
+
+	var dirs []int
+	for start := range m.walls {
+		for i := start; state[i] == outside; {
+			dirs = m.carveDirs(i, dirs)
+			dir := dirs[m.rng().Intn(len(dirs))]
+			exit[i] = uint8(dir)
+			i = m.neighbor(i, dir)
+		}
+		for i := start; state[i] == outside; {
+			state[i] = inside
+			m.clearWall(i, int(exit[i]))
+			i = m.neighbor(i, int(exit[i]))
+		}
+	}
+}
+
+// Eller: carve the maze one row at a time, keeping only the set membership
+// of the current row. The rows are written directly, so it expects a fresh
+// grid.
+func ellerGen(m *Maze) {
+	e := newEllerRows(m.width, m.rng())
+	for y := 0; y < m.height; y++ {
+		e.Next(m.walls[y*m.width:(y+1)*m.width], y == m.height-1)
+	}
+	if !m.genOnly {
+		kruskalPrepare(m)
+	}
+}
+
+// ellerRows produces a perfect maze row by row in O(width) memory.
+type ellerRows struct {
+	set   []int32 // set of each cell in the current row
+	down  []bool  // passages opened from the previous row into this one
+	sets  *disjointSet
+	label []int32
+	count []int32 // cells of each set seen so far in the row
+	pick  []int32 // cell of each set to open down if none was chosen
+	rnd   *rand.Rand
+}
+
+func newEllerRows(width int, rnd *rand.Rand) *ellerRows {
+	e := &ellerRows{
+		rnd:   rnd,
+		set:   make([]int32, width),
+		down:  make([]bool, width),
+		sets:  newDisjointSet(width),
+		label: make([]int32, width),
+		count: make([]int32, width),
+		pick:  make([]int32, width),
+	}
+	for x := range e.set {
+		e.set[x] = int32(x)
+	}
+	return e
+}
+
+// Next writes the wall bits of the next row into row. The last row joins
+// every remaining set so the maze ends up connected.
+func (e *ellerRows) Next(row []uint8, last bool) {
+	w := len(row)
+	for x := range row {
+		row[x] = 1<<Up | 1<<Down | 1<<Left | 1<<Right
+		if e.down[x] {
+			row[x] &^= 1 << Up
+		}
+	}
+
+	// join neighbouring cells of different sets at random
+	for x := 0; x < w-1; x++ {
+		a, b := e.sets.Find(int(e.set[x])), e.sets.Find(int(e.set[x+1]))
+		if a != b && (last || e.rnd.Intn(2) == 0) {
+			e.sets.Union(a, b)
+			row[x] &^= 1 << Right
+			row[x+1] &^= 1 << Left
+		}
+	}
+	for x := range e.set {
+		e.set[x] = int32(e.sets.Find(int(e.set[x])))
+	}
+	if last {
+		return
+	}
+
+	// open passages down at random, then make sure every set has at least
+	// one by opening a cell of it picked uniformly by reservoir sampling;
+	// label marks the sets that already have one
+	for i := range e.count {
+		e.count[i] = 0
+		e.label[i] = 0
+	}
+	for x := range e.set {
+		s := e.set[x]
+		e.down[x] = e.rnd.Intn(2) == 0
+		if e.down[x] {
+			e.label[s] = 1
+		}
+		e.count[s]++
+		if e.rnd.Int31n(e.count[s]) == 0 {
+			e.pick[s] = int32(x)
+		}
+	}
+	for x := range e.set {
+		if s := e.set[x]; e.label[s] == 0 {
+			e.down[e.pick[s]] = true
+			e.label[s] = 1
+		}
+	}
+	for x := range row {
+		if e.down[x] {
+			row[x] &^= 1 << Down
+		}
+	}
+
+	// cells below carry their set down, the rest start new sets; relabel
+	// so set numbers stay below width
+	for i := range e.label {
+		e.label[i] = -1
+	}
+	n := int32(0)
+	for x := range e.set {
+		if e.down[x] {
+			if e.label[e.set[x]] < 0 {
+				e.label[e.set[x]] = n
+				n++
+			}
+			e.set[x] = e.label[e.set[x]]
+		} else {
+			e.set[x] = -1
+		}
+	}
+	for x := range e.set {
+		if e.set[x] < 0 {
+			e.set[x] = n
+			n++
+		}
+	}
+	for i := range e.sets.parent {
+		e.sets.parent[i] = int32(i)
+		e.sets.rank[i] = 0
+	}
+}
@@ -0,0 +1,69 @@
+package main
+
+import (
+	"math/rand"
+	"runtime"
+	"sync"
+)
+
+// MazeBatch holds the wall bits of n mazes of the same size in a single
+// array laid out as [n][height][width], for seed sweeps that would
+// otherwise build every maze as its own object.
+type MazeBatch struct {
+	n      int
+	width  int
+	height int
+	walls  []uint8
+}
+
+// newMazeBatch generates n mazes with algo, maze k seeded with seed+k, so
+// any maze of the batch can be reproduced on its own. The mazes are spread
+// over one worker per CPU, each reusing the buffers of a single scratch
+// maze that skips building what regeneration would need.
+func newMazeBatch(n, width, height int, algo *MazeAlgorithm, seed int64) *MazeBatch {
+	b := &MazeBatch{
+		n:      n,
+		width:  width,
+		height: height,
+		walls:  make([]uint8, n*width*height),
+	}
+
+	jobs := make(chan int)
+	var wg sync.WaitGroup
+	for w := 0; w < runtime.GOMAXPROCS(0); w++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			m := &Maze{width: width, height: height, algo: algo, genOnly: true}
+			for k := range jobs {
+				m.rnd = rand.New(rand.NewSource(seed + int64(k)))
+				algo.Reset(m)
+				algo.Gen(m)
+				copy(b.Walls(k), m.walls)
+			}
+		}()
+	}
+	for k := 0; k < n; k++ {
+		jobs <- k
+	}
+	close(jobs)
+	wg.Wait()
+	return b
+}
+
+// Walls returns the wall bits of maze k in row order; the slice aliases
+// the batch.
+func (b *MazeBatch) Walls(k int) []uint8 {
+	c := b.width * b.height
+	return b.walls[k*c : (k+1)*c]
+}
+
+// Maze returns maze k of the batch as a regular maze regenerated with
+// algo.
+func (b *MazeBatch) Maze(k int, algo *MazeAlgorithm) *Maze {
+	m := &Maze{width: b.width, height: b.height, algo: algo}
+	m.alloc()
+	copy(m.walls, b.Walls(k))
+	algo.Prepare(m)
+	return m
+}
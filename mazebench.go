@@ -0,0 +1,358 @@
+package main
+
+import (
+	"bytes"
+	"flag"
+	"fmt"
+	"log"
+	"math/rand"
+	"os"
+	"path/filepath"
+	"runtime"
+	"runtime/metrics"
+	"strings"
+	"time"
+
+	"github.com/qeedquan/go-media/sdl"
+)
+
+var (
+	genAlgo  = flag.String("gen", "", "generate mazes headless with this algorithm (or all) and report timings")
+	genSize  = flag.String("gensize", "22x18", "comma separated sizes of the generated mazes in cells")
+	genSeed  = flag.Int64("genseed", 1, "random seed of the first generated maze")
+	genCount = flag.Int("gencount", 1, "number of mazes to generate per algorithm and size")
+	genOut   = flag.String("genout", "", "save the generated mazes to this directory and time loading them back")
+	genBatch = flag.Bool("genbatch", false, "also time generating all -gencount mazes as one batch")
+	genFile  = flag.String("genstream", "", "stream one eller maze of the first -gensize to this file")
+	genWorld = flag.Int("genworld", 0, "pan this many cells across a chunked world of -gen chunks sized by the first -gensize")
+	genCheck = flag.Bool("gencheck", false, "validate every maze after generation and regeneration")
+	genMobs  = flag.Int("genmobs", 0, "run a crowd of this many mobs on a -gen maze of the first -gensize")
+)
+
+// regenCold is the first regeneration on a fresh maze, which includes
+// building any structure the algorithm keeps between regenerations; load
+// reads a maze saved with -genout back in.
+type phaseTimes struct {
+	reset, gen, regenCold, regen, load time.Duration
+}
+
+type benchResult struct {
+	algo          string
+	width, height int
+	mean          phaseTimes
+	cellsPerSec   float64
+	peakHeap      uint64 // most heap object bytes held above the baseline
+}
+
+// runMazeBench generates -gencount mazes for every algorithm and size asked
+// for without touching SDL, printing per-phase timings, throughput and heap
+// usage, followed by a comparison table.
+func runMazeBench() {
+	log.SetPrefix("gen: ")
+
+	var sizes [][2]int
+	for _, s := range strings.Split(*genSize, ",") {
+		var w, h int
+		if _, err := fmt.Sscanf(s, "%dx%d", &w, &h); err != nil || w < 1 || h < 1 {
+			log.Fatalf("invalid maze size %q", s)
+		}
+		sizes = append(sizes, [2]int{w, h})
+	}
+
+	if *genFile != "" {
+		streamMaze(*genFile, sizes[0][0], sizes[0][1])
+		return
+	}
+
+	algos := []string{*genAlgo}
+	if *genAlgo == "all" {
+		algos = mazeAlgorithmNames()
+	}
+	for _, name := range algos {
+		if _, found := mazeAlgorithms[name]; !found {
+			log.Fatalf("unknown maze algorithm %q", name)
+		}
+	}
+
+	if *genMobs > 0 {
+		for _, name := range algos {
+			runCrowd(mazeAlgorithms[name], sizes[0][0], sizes[0][1], *genMobs)
+		}
+		return
+	}
+
+	if *genWorld > 0 {
+		for _, name := range algos {
+			panWorld(mazeAlgorithms[name], sizes[0][0], *genWorld)
+		}
+		return
+	}
+
+	var results []benchResult
+	for _, size := range sizes {
+		for _, name := range algos {
+			results = append(results, benchMazeAlgo(mazeAlgorithms[name], size[0], size[1]))
+			if *genBatch {
+				benchMazeBatch(mazeAlgorithms[name], size[0], size[1])
+			}
+		}
+	}
+
+	if len(results) > 1 {
+		fmt.Printf("\n%-12s %11s %12s %12s %12s %12s %14s %14s\n",
+			"algorithm", "size", "reset", "gen", "regen", "regen cold", "cells/s", "peak heap KiB")
+		for _, r := range results {
+			fmt.Printf("%-12s %11s %12v %12v %12v %12v %14.0f %14d\n",
+				r.algo, fmt.Sprintf("%dx%d", r.width, r.height),
+				r.mean.reset, r.mean.gen, r.mean.regen, r.mean.regenCold,
+				r.cellsPerSec, r.peakHeap/1024)
+		}
+	}
+}
+
+func benchMazeAlgo(algo *MazeAlgorithm, w, h int) benchResult {
+	var (
+		total    phaseTimes
+		peakHeap uint64
+	)
+
+	// the regenerated patches get their own stream, so they don't move
+	// when an algorithm draws more or fewer numbers carving a maze
+	patches := rand.New(rand.NewSource(*genSeed))
+	for i := 0; i < *genCount; i++ {
+		// the previous maze is collected first, so each one is measured
+		// from the same baseline
+		peak := startHeapPeak()
+
+		// seeded the same way as newMazeBatch so maze i matches batch maze i
+		m := &Maze{width: w, height: h, algo: algo}
+		m.rnd = rand.New(rand.NewSource(*genSeed + int64(i)))
+
+		var t phaseTimes
+		start := time.Now()
+		algo.Reset(m)
+		t.reset = time.Since(start)
+
+		start = time.Now()
+		algo.Gen(m)
+		t.gen = time.Since(start)
+		checkMaze(m)
+
+		if *genOut != "" {
+			name := filepath.Join(*genOut, fmt.Sprintf("%s_%dx%d_%d.maze", algo.Name, w, h, i))
+			if err := m.Save(name); err != nil {
+				log.Fatal(err)
+			}
+
+			start = time.Now()
+			l, err := loadMaze(name, algo)
+			t.load = time.Since(start)
+			if err != nil {
+				log.Fatal(err)
+			}
+			if !bytes.Equal(l.walls, m.walls) {
+				log.Fatalf("%s: loaded maze differs from the one saved", name)
+			}
+			checkMaze(l)
+		}
+
+		// mouse mutator sized patches at random spots
+		for _, d := range []*time.Duration{&t.regenCold, &t.regen} {
+			r := sdl.Rect{int32(patches.Intn(m.Px())) - 32, int32(patches.Intn(m.Py())) - 32, 64, 64}
+			start = time.Now()
+			algo.Regen(m, m.CollideNodes(r))
+			*d = time.Since(start)
+				checkMaze(m)
+		}
+		heap := peak.Stop()
+		if heap > peakHeap {
+			peakHeap = heap
+		}
+
+		fmt.Printf("%s %dx%d maze %d: seed %d reset %v gen %v regen %v (cold %v) peak heap %d KiB\n",
+			algo.Name, w, h, i, *genSeed+int64(i), t.reset, t.gen, t.regen, t.regenCold, heap/1024)
+		total.reset += t.reset
+		total.gen += t.gen
+		total.regenCold += t.regenCold
+		total.regen += t.regen
+		total.load += t.load
+	}
+
+	n := time.Duration(*genCount)
+	r := benchResult{
+		algo:   algo.Name,
+		width:  w,
+		height: h,
+		mean: phaseTimes{
+			reset:     total.reset / n,
+			gen:       total.gen / n,
+			regenCold: total.regenCold / n,
+			regen:     total.regen / n,
+			load:      total.load / n,
+		},
+		cellsPerSec: float64(w*h) * float64(*genCount) / (total.reset + total.gen).Seconds(),
+		peakHeap:    peakHeap,
+	}
+	fmt.Printf("%s %dx%d x%d: reset %v gen %v regen %v (cold %v) (mean)\n",
+		algo.Name, w, h, *genCount, r.mean.reset, r.mean.gen, r.mean.regen, r.mean.regenCold)
+	if *genOut != "" {
+		fmt.Printf("load: %v (mean)\n", r.mean.load)
+	}
+	fmt.Printf("throughput: %.0f cells/s\n", r.cellsPerSec)
+	fmt.Printf("peak heap: %d KiB above the baseline\n", peakHeap/1024)
+	return r
+}
+
+// heapPeak samples the bytes held by heap objects from a goroutine while a
+// maze is built, so a high-water mark reached and collected again within
+// a phase still shows up.
+type heapPeak struct {
+	base, peak uint64
+	done       chan struct{}
+	stopped    chan struct{}
+}
+
+// startHeapPeak collects garbage, takes the baseline and starts sampling.
+func startHeapPeak() *heapPeak {
+	runtime.GC()
+	p := &heapPeak{
+		base:    heapObjects(),
+		done:    make(chan struct{}),
+		stopped: make(chan struct{}),
+	}
+	p.peak = p.base
+	go func() {
+		defer close(p.stopped)
+		t := time.NewTicker(100 * time.Microsecond)
+		defer t.Stop()
+		for {
+			p.sample()
+			select {
+			case <-t.C:
+			case <-p.done:
+				return
+			}
+		}
+	}()
+	return p
+}
+
+// Stop ends the sampling and returns the peak above the baseline.
+func (p *heapPeak) Stop() uint64 {
+	close(p.done)
+	<-p.stopped
+	p.sample()
+	return p.peak - p.base
+}
+
+func (p *heapPeak) sample() {
+	if n := heapObjects(); n > p.peak {
+		p.peak = n
+	}
+}
+
+func heapObjects() uint64 {
+	s := []metrics.Sample{{Name: "/memory/classes/heap/objects:bytes"}}
+	metrics.Read(s)
+	return s[0].Value.Uint64()
+}
+
+// checkMaze validates m with -gencheck, from its top left cell to its
+// bottom right one where the game puts the player and the lock.
+func checkMaze(m *Maze) {
+	if !*genCheck {
+		return
+	}
+	if err := m.Validate(m.Node(0, 0), m.Node(m.width-1, m.height-1)); err != nil {
+		log.Fatal(err)
+	}
+}
+
+func benchMazeBatch(algo *MazeAlgorithm, w, h int) {
+	start := time.Now()
+	newMazeBatch(*genCount, w, h, algo, *genSeed)
+	t := time.Since(start)
+	fmt.Printf("%s %dx%d batch of %d: %v, %.0f cells/s\n",
+		algo.Name, w, h, *genCount, t, float64(w*h)*float64(*genCount)/t.Seconds())
+}
+
+func streamMaze(name string, w, h int) {
+	f, err := os.Create(name)
+	if err != nil {
+		log.Fatal(err)
+	}
+
+	start := time.Now()
+	err = writeEllerMaze(f, w, h, rand.New(rand.NewSource(*genSeed)))
+	if xerr := f.Close(); err == nil {
+		err = xerr
+	}
+	if err != nil {
+		log.Fatal(err)
+	}
+	t := time.Since(start)
+
+	var ms runtime.MemStats
+	runtime.ReadMemStats(&ms)
+	fmt.Printf("eller %dx%d streamed to %s: %v, %.0f cells/s, heap obtained from OS: %d KiB\n",
+		w, h, name, t, float64(w)*float64(h)/t.Seconds(), ms.Sys/1024)
+}
+
+// panWorld moves a maze sized view one cell at a time across a chunked
+// world, keeping the chunks around it loaded the way a scrolling level
+// would, and reports how generation and eviction kept up.
+func panWorld(algo *MazeAlgorithm, size, cells int) {
+	const viewRadius = 16
+	capacity := 4 * (2*viewRadius/size + 2) * (2*viewRadius/size + 2)
+	w := newChunkedMaze(*genSeed, size, capacity, algo)
+
+	start := time.Now()
+	for x := 0; x < cells; x++ {
+		w.Touch(x, x/2, viewRadius)
+	}
+	t := time.Since(start)
+
+	var ms runtime.MemStats
+	runtime.ReadMemStats(&ms)
+	fmt.Printf("%s world of %dx%d chunks, panned %d cells: %v, %d chunks generated, %d evicted, %d resident, heap %d KiB\n",
+		algo.Name, size, size, cells, t, w.generated, w.evicted, w.lru.Len(), ms.HeapAlloc/1024)
+}
+
+// runCrowd times a crowd of mobs, a third of them enemies, wandering a maze
+// while the player hops to a new cell every second.
+func runCrowd(algo *MazeAlgorithm, w, h, n int) {
+	const frames = 300
+	rnd := rand.New(rand.NewSource(*genSeed))
+	m := &Maze{width: w, height: h, algo: algo, rnd: rnd}
+	algo.Reset(m)
+	algo.Gen(m)
+
+	c := newMobCrowd(m, rnd, rnd, nil)
+	for k := 0; k < n; k++ {
+		c.Add(rnd.Intn(w)*16, rnd.Intn(h)*16, k%3 == 0)
+	}
+
+	var total, worst time.Duration
+	var px, py int
+	for f := 0; f < frames; f++ {
+		if f%30 == 0 {
+			px, py = rnd.Intn(w)*16, rnd.Intn(h)*16
+		}
+		start := time.Now()
+		c.Update(px, py)
+		t := time.Since(start)
+		total += t
+		if t > worst {
+			worst = t
+		}
+	}
+
+	chasing := 0
+	for k := 0; k < c.Len(); k++ {
+		if c.Mob(k).State() == "chase" {
+			chasing++
+		}
+	}
+	fmt.Printf("%s %dx%d crowd of %d mobs: %v per frame (worst %v), %d chasing at the end\n",
+		algo.Name, w, h, n, total/frames, worst, chasing)
+}
@@ -0,0 +1,281 @@
+package main
+
+import (
+	"bufio"
+	"encoding/binary"
+	"errors"
+	"fmt"
+	"io"
+	"math/rand"
+	"os"
+)
+
+// Maze files start with a 16 byte header followed by the cell sections,
+// each holding one 4-bit value per cell packed two to a byte, low nibble
+// first, in row order:
+//
+//	magic    [4]byte "MMAZ"
+//	version  uint8
+//	sections uint8   bit set for each optional section present
+//	reserved uint16
+//	width    uint32  little endian
+//	height   uint32  little endian
+//	walls    wall bits of each cell
+//	colors   EGA palette index of each cell (optional)
+const (
+	mazeFileMagic   = "MMAZ"
+	mazeFileVersion = 1
+	mazeHeaderSize  = 16
+
+	// limits on the header, so a damaged or crafted one can't overflow
+	// the size computations or ask for a huge allocation
+	mazeMaxSide  = 1 << 24
+	mazeMaxCells = 1 << 30
+)
+
+const (
+	mazeHasColors = 1 << iota
+)
+
+var errBadMazeFile = errors.New("not a maze file")
+
+type mazeHeader struct {
+	sections      uint8
+	width, height int
+}
+
+func (h mazeHeader) encode() []byte {
+	b := make([]byte, mazeHeaderSize)
+	copy(b, mazeFileMagic)
+	b[4] = mazeFileVersion
+	b[5] = h.sections
+	binary.LittleEndian.PutUint32(b[8:], uint32(h.width))
+	binary.LittleEndian.PutUint32(b[12:], uint32(h.height))
+	return b
+}
+
+func decodeMazeHeader(b []byte) (mazeHeader, error) {
+	var h mazeHeader
+	if len(b) < mazeHeaderSize || string(b[:4]) != mazeFileMagic {
+		return h, errBadMazeFile
+	}
+	if b[4] != mazeFileVersion {
+		return h, fmt.Errorf("unsupported maze file version %d", b[4])
+	}
+	h.sections = b[5]
+	if h.sections&^mazeHasColors != 0 {
+		return h, fmt.Errorf("unknown maze file sections %#x", h.sections)
+	}
+	width := binary.LittleEndian.Uint32(b[8:])
+	height := binary.LittleEndian.Uint32(b[12:])
+	if width < 1 || height < 1 || width > mazeMaxSide || height > mazeMaxSide ||
+		uint64(width)*uint64(height) > mazeMaxCells {
+		return h, fmt.Errorf("invalid maze size %dx%d", width, height)
+	}
+	h.width, h.height = int(width), int(height)
+	return h, nil
+}
+
+// readMazeHeader reads just the header of the maze file name, so a maze can
+// be checked before it is loaded.
+func readMazeHeader(name string) (mazeHeader, error) {
+	f, err := os.Open(name)
+	if err != nil {
+		return mazeHeader{}, err
+	}
+	defer f.Close()
+
+	b := make([]byte, mazeHeaderSize)
+	if _, err := io.ReadFull(f, b); err != nil {
+		return mazeHeader{}, fmt.Errorf("%s: %v", name, errBadMazeFile)
+	}
+	h, err := decodeMazeHeader(b)
+	if err != nil {
+		return h, fmt.Errorf("%s: %v", name, err)
+	}
+	return h, nil
+}
+
+// size returns the length of the whole file described by the header.
+func (h mazeHeader) size() int {
+	n := 1
+	for s := h.sections; s != 0; s >>= 1 {
+		n += int(s & 1)
+	}
+	return mazeHeaderSize + n*nibbleBytes(h.width*h.height)
+}
+
+func nibbleBytes(n int) int {
+	return (n + 1) / 2
+}
+
+func packNibbles(dst []byte, src []uint8) {
+	for i, v := range src {
+		if i&1 == 0 {
+			dst[i/2] = v & 0xF
+		} else {
+			dst[i/2] |= v << 4
+		}
+	}
+}
+
+func unpackNibbles(dst []uint8, src []byte) {
+	for i := range dst {
+		dst[i] = src[i/2] >> (uint(i&1) * 4) & 0xF
+	}
+}
+
+// Save writes the maze to name. Colors are only stored when some cell
+// differs from the default.
+func (m *Maze) Save(name string) error {
+	h := mazeHeader{width: m.width, height: m.height}
+	c := egaIndex(MazeColor)
+	for i := range m.colors {
+		if m.colors[i] != c {
+			h.sections |= mazeHasColors
+		}
+	}
+
+	f, err := os.Create(name)
+	if err != nil {
+		return err
+	}
+	w := bufio.NewWriter(f)
+	w.Write(h.encode())
+
+	buf := make([]byte, nibbleBytes(len(m.walls)))
+	for _, s := range []struct {
+		bit   uint8
+		cells []uint8
+	}{
+		{0, m.walls},
+		{mazeHasColors, m.colors},
+	} {
+		if s.bit != 0 && h.sections&s.bit == 0 {
+			continue
+		}
+		packNibbles(buf, s.cells)
+		w.Write(buf)
+	}
+
+	err = w.Flush()
+	if xerr := f.Close(); err == nil {
+		err = xerr
+	}
+	return err
+}
+
+// loadMaze reads a maze saved with Save; algo regenerates it from then on
+// and has what it needs for that built before loadMaze returns.
+// The file is memory mapped and the cells are unpacked straight out of the
+// mapping, so no read buffer is allocated and processes loading the same
+// file share its pages.
+func loadMaze(name string, algo *MazeAlgorithm) (*Maze, error) {
+	b, unmap, err := mapFile(name)
+	if err != nil {
+		return nil, err
+	}
+	defer unmap()
+
+	h, err := decodeMazeHeader(b)
+	if err != nil {
+		return nil, fmt.Errorf("%s: %v", name, err)
+	}
+	// the cells are only allocated once the file is known to hold them
+	if len(b) < h.size() {
+		return nil, fmt.Errorf("%s: truncated maze file", name)
+	}
+
+	m := &Maze{width: h.width, height: h.height, algo: algo}
+	m.alloc()
+
+	n := nibbleBytes(len(m.walls))
+	b = b[mazeHeaderSize:]
+	unpackNibbles(m.walls, b[:n])
+	b = b[n:]
+	if h.sections&mazeHasColors != 0 {
+		unpackNibbles(m.colors, b[:n])
+	}
+	algo.Prepare(m)
+	return m, nil
+}
+
+// nibbleWriter packs a stream of 4-bit cell values two to a byte, carrying
+// the odd half byte over between writes.
+type nibbleWriter struct {
+	w    *bufio.Writer
+	b    byte
+	half bool
+}
+
+// Write packs cells, returning the first error the underlying writer has
+// run into so far.
+func (p *nibbleWriter) Write(cells []uint8) error {
+	var err error
+	for _, v := range cells {
+		if p.half {
+			err = p.w.WriteByte(p.b | v<<4)
+		} else {
+			p.b = v & 0xF
+		}
+		p.half = !p.half
+	}
+	return err
+}
+
+func (p *nibbleWriter) Flush() error {
+	if p.half {
+		p.w.WriteByte(p.b)
+		p.half = false
+	}
+	return p.w.Flush()
+}
+
+// writeEllerMaze streams a perfect maze of the given size to w in the maze
+// file format without ever holding more than a few rows of it. One
+// goroutine generates rows with Eller's algorithm while the caller packs
+// and writes them; the row buffers are recycled between the two, so memory
+// use is O(width) however tall the maze is. A write error stops the
+// generator and is returned straight away.
+func writeEllerMaze(w io.Writer, width, height int, rnd *rand.Rand) error {
+	bw := bufio.NewWriter(w)
+	if _, err := bw.Write(mazeHeader{width: width, height: height}.encode()); err != nil {
+		return err
+	}
+
+	const buffers = 4
+	rows := make(chan []uint8, buffers)
+	free := make(chan []uint8, buffers)
+	done := make(chan struct{})
+	defer close(done)
+	for i := 0; i < buffers; i++ {
+		free <- make([]uint8, width)
+	}
+	go func() {
+		defer close(rows)
+		e := newEllerRows(width, rnd)
+		for y := 0; y < height; y++ {
+			var row []uint8
+			select {
+			case row = <-free:
+			case <-done:
+				return
+			}
+			e.Next(row, y == height-1)
+			select {
+			case rows <- row:
+			case <-done:
+				return
+			}
+		}
+	}()
+
+	p := nibbleWriter{w: bw}
+	for row := range rows {
+		if err := p.Write(row); err != nil {
+			return err
+		}
+		free <- row
+	}
+	return p.Flush()
+}
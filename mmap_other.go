@@ -0,0 +1,14 @@
+//go:build !unix
+
+package main
+
+import "os"
+
+// mapFile reads name into memory on platforms without mmap.
+func mapFile(name string) (b []byte, unmap func() error, err error) {
+	b, err = os.ReadFile(name)
+	if err != nil {
+		return nil, nil, err
+	}
+	return b, func() error { return nil }, nil
+}
@@ -1,13 +1,14 @@
 package main
 
 import (
-	"math"
-	"math/rand"
-
 	"github.com/qeedquan/go-media/sdl"
 	"github.com/qeedquan/go-media/sdl/sdlmixer"
 )
 
+// ChaseDistance is how many cells away a chasing enemy keeps following the
+// player around corners before giving up.
+const ChaseDistance = 8
+
 type Mob struct {
 	Entity
 
@@ -30,19 +31,15 @@ func newMob(gs *GameState, x, y int) *Mob {
 	m := &Mob{}
 	m.gs = gs
 	m.x, m.y = x, y
-	m.good = loadImage("other_dude.png", colorBlackRandom(SpriteColors))
-	m.bad = loadImage("ghost.png", colorBlackRandom(BadColors))
+	m.dir, m.wantedDir = NoDir, NoDir
+	m.good = loadRandomSprite("other_dude.png", SpriteColors, gs.rnd.sprite)
+	m.bad = loadRandomSprite("ghost.png", BadColors, gs.rnd.sprite)
 	m.exclamation = loadImage("exclamation.png")
+	m.exclaim = loadSound("exclamation.wav")
 	m.setFriendly()
 	return m
 }
 
-func (m *Mob) Free() {
-	m.good.Free()
-	m.bad.Free()
-	m.exclamation.Free()
-}
-
 func (m *Mob) Hitbox() sdl.Rect {
 	return sdl.Rect{int32(m.x) + 4, int32(m.y) + 3, 8, 10}
 }
@@ -66,7 +63,7 @@ func (m *Mob) initNothing() {
 func (m *Mob) Update() {
 	switch {
 	case m.isDead:
-		m.image.angle = math.Mod(m.image.angle+90, 360)
+		m.spinDead()
 		m.x, m.y = m.x+m.dvx, m.y+m.dvy
 		m.dvy++
 	case m.kind == "friendly":
@@ -78,7 +75,7 @@ func (m *Mob) Update() {
 
 func (m *Mob) initWait() {
 	m.state = "wait"
-	m.waitCount = 3 + rand.Intn(6)
+	m.waitCount = 3 + m.gs.rnd.mob.Intn(6)
 }
 
 func (m *Mob) initRandom() {
@@ -87,7 +84,7 @@ func (m *Mob) initRandom() {
 	// otherwise only change if right in middle of node
 	n := m.gs.maze.Node(m.x/16, m.y/16)
 	l := n.AvailDirs()
-	m.wantedDir = l[rand.Intn(len(l))]
+	m.wantedDir = l[m.gs.rnd.mob.Intn(len(l))]
 	m.dir = m.wantedDir
 }
 
@@ -98,7 +95,7 @@ func (m *Mob) initChase() {
 func (m *Mob) friendlyUpdate() {
 	if m.state == "nothing" {
 		f := []func(){m.initWait, m.initRandom}
-		f[rand.Intn(len(f))]()
+		f[m.gs.rnd.mob.Intn(len(f))]()
 	}
 
 	switch m.state {
@@ -114,7 +111,7 @@ func (m *Mob) friendlyUpdate() {
 func (m *Mob) enemyUpdate() {
 	if m.state == "nothing" {
 		f := []func(){m.initWait, m.initRandom}
-		f[rand.Intn(len(f))]()
+		f[m.gs.rnd.mob.Intn(len(f))]()
 	}
 	m.detectPlayer()
 
@@ -131,14 +128,7 @@ func (m *Mob) enemyUpdate() {
 }
 
 func (m *Mob) updateRandom() {
-	dirs := map[string]sdl.Point{
-		"up":    {0, -1},
-		"down":  {0, 1},
-		"left":  {-1, 0},
-		"right": {1, 0},
-	}
-
-	p := dirs[m.dir]
+	p := dirOffsets[m.dir]
 	m.x, m.y = m.x+int(p.X), m.y+int(p.Y)
 
 	// otherwise only change if right in middle of node
@@ -164,29 +154,35 @@ func (m *Mob) updateFollowPlayer() {
 func (m *Mob) updateChase() {
 	if m.x%16 == 0 && m.y%16 == 0 {
 		n := m.gs.maze.Node(m.x/16, m.y/16)
+		f := m.gs.PlayerFlow()
+		if d := f.Dist(n); d > 0 && d <= ChaseDistance {
+			p := dirOffsets[f.Dir(n)]
+			m.cvx, m.cvy = int(p.X)*2, int(p.Y)*2
+		}
+
 		if m.cvx < 0 {
-			if !n.open[Left] {
+			if !n.IsOpen(Left) {
 				m.initNothing()
 				return
 			}
 		}
 
 		if m.cvx > 0 {
-			if !n.open[Right] {
+			if !n.IsOpen(Right) {
 				m.initNothing()
 				return
 			}
 		}
 
 		if m.cvy < 0 {
-			if !n.open[Up] {
+			if !n.IsOpen(Up) {
 				m.initNothing()
 				return
 			}
 		}
 
 		if m.cvy > 0 {
-			if !n.open[Down] {
+			if !n.IsOpen(Down) {
 				m.initNothing()
 				return
 			}
@@ -213,22 +209,13 @@ func (m *Mob) updateExclamation() {
 	}
 }
 
-func (m *Mob) detectDirFunc(dir int) func(*MazeNode) *MazeNode {
-	return func(x *MazeNode) *MazeNode {
-		if x.open[dir] {
-			return x.Node(dir)
-		}
-		return nil
-	}
-}
-
 func (m *Mob) detectPlayer() {
 	if m.state == "exclamation" {
 		return
 	}
 
 	if m.y%16 == 0 {
-		if m.findPlayerOn(m.detectDirFunc(Left)) {
+		if m.seesPlayer(Left) {
 			if m.state == "chase" && m.cvx < 0 {
 				return
 			}
@@ -236,7 +223,7 @@ func (m *Mob) detectPlayer() {
 			return
 		}
 
-		if m.findPlayerOn(m.detectDirFunc(Right)) {
+		if m.seesPlayer(Right) {
 			if m.state == "chase" && m.cvx > 0 {
 				return
 			}
@@ -246,7 +233,7 @@ func (m *Mob) detectPlayer() {
 	}
 
 	if m.x%16 == 0 {
-		if m.findPlayerOn(m.detectDirFunc(Up)) {
+		if m.seesPlayer(Up) {
 			if m.state == "chase" && m.cvy < 0 {
 				return
 			}
@@ -254,7 +241,7 @@ func (m *Mob) detectPlayer() {
 			return
 		}
 
-		if m.findPlayerOn(m.detectDirFunc(Down)) {
+		if m.seesPlayer(Down) {
 			if m.state == "chase" && m.cvy > 0 {
 				return
 			}
@@ -264,19 +251,14 @@ func (m *Mob) detectPlayer() {
 	}
 }
 
-func (m *Mob) findPlayerOn(nextNode func(*MazeNode) *MazeNode) bool {
+// seesPlayer reports whether the player overlaps a cell of the corridor
+// running from the mob's cell in direction dir.
+func (m *Mob) seesPlayer(dir int) bool {
 	s := m.gs
-
-	n := s.maze.Node(m.x/16, m.y/16)
 	p := s.player.Hitbox()
-	for n != nil {
-		if n.Hitbox().Collide(p) {
-			return true
-		}
-		n = nextNode(n)
-	}
-
-	return false
+	x0, x1 := cellSpan(int(p.X), int(p.W), s.maze.width)
+	y0, y1 := cellSpan(int(p.Y), int(p.H), s.maze.height)
+	return s.maze.CorridorSees(m.x/16, m.y/16, dir, x0, y0, x1, y1)
 }
 
 func (m *Mob) ToggleKind() {
@@ -310,7 +292,7 @@ func (m *Mob) Die() {
 	}
 
 	m.isDead = true
-	m.dvx = 3 - rand.Intn(7)
+	m.dvx = 3 - m.gs.rnd.mob.Intn(7)
 	m.dvy = -3
 }
 
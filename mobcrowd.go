@@ -0,0 +1,263 @@
+package main
+
+import (
+	"math/rand"
+
+	"github.com/qeedquan/go-media/sdl"
+)
+
+// Mob states of the crowd engine, in the place of the state names Mob uses.
+const (
+	mobNothing = iota
+	mobWait
+	mobRandom
+	mobExclamation
+	mobChase
+)
+
+var mobStateNames = [...]string{
+	mobNothing:     "nothing",
+	mobWait:        "wait",
+	mobRandom:      "random",
+	mobExclamation: "exclamation",
+	mobChase:       "chase",
+}
+
+// mobCrowd runs the wandering, waiting and chasing of Mob for crowds too
+// large to update one object at a time. Every mob is an index into
+// parallel arrays, and a frame is a few passes over them: pick new states,
+// look for the player, move, then count down timers. Following the player,
+// fog mutation and dying stay with Mob.
+type mobCrowd struct {
+	maze      *Maze
+	rnd       *rand.Rand
+	spriteRnd *rand.Rand
+	sprites   *mobSprites
+
+	x, y      []int32
+	cvx, cvy  []int8
+	dir       []int8
+	enemy     []bool
+	state     []uint8
+	timer     []int16 // frames left to wait or to exclaim
+	good, bad []uint8 // colors of the mob's sprites in mobSprites
+}
+
+// mobSprites are the sprites a crowd is drawn with, the friendly and the
+// enemy one in every color of their palettes.
+type mobSprites struct {
+	good, bad   []*Image
+	exclamation *Image
+}
+
+func loadMobSprites() *mobSprites {
+	s := &mobSprites{exclamation: loadImage("exclamation.png")}
+	for _, c := range SpriteColors {
+		s.good = append(s.good, loadSprite("other_dude.png", c))
+	}
+	for _, c := range BadColors {
+		s.bad = append(s.bad, loadSprite("ghost.png", c))
+	}
+	return s
+}
+
+// newMobCrowd makes an empty crowd on m moving with rnd. Each mob added
+// picks its colors from spriteRnd the way Mob does; sprites may be nil for
+// a crowd that is never drawn.
+func newMobCrowd(m *Maze, rnd, spriteRnd *rand.Rand, sprites *mobSprites) *mobCrowd {
+	return &mobCrowd{maze: m, rnd: rnd, spriteRnd: spriteRnd, sprites: sprites}
+}
+
+func (c *mobCrowd) Len() int {
+	return len(c.x)
+}
+
+// Add puts a new mob at pixel (x, y) and returns its index.
+func (c *mobCrowd) Add(x, y int, enemy bool) int {
+	c.x = append(c.x, int32(x))
+	c.y = append(c.y, int32(y))
+	c.cvx = append(c.cvx, 0)
+	c.cvy = append(c.cvy, 0)
+	c.dir = append(c.dir, NoDir)
+	c.enemy = append(c.enemy, enemy)
+	c.state = append(c.state, mobNothing)
+	c.timer = append(c.timer, 0)
+	c.good = append(c.good, uint8(randomSpriteColor(SpriteColors, c.spriteRnd)))
+	c.bad = append(c.bad, uint8(randomSpriteColor(BadColors, c.spriteRnd)))
+	return len(c.x) - 1
+}
+
+// Update advances every mob by one frame with the player at pixel
+// (px, py).
+func (c *mobCrowd) Update(px, py int) {
+	m := c.maze
+
+	// mobs with nothing to do start waiting or wander off
+	for k, s := range c.state {
+		if s != mobNothing {
+			continue
+		}
+		if c.rnd.Intn(2) == 0 {
+			c.state[k] = mobWait
+			c.timer[k] = int16(3 + c.rnd.Intn(6))
+			continue
+		}
+
+		var dirs [4]int8
+		n := 0
+		w := m.walls[int(c.y[k]/16)*m.width+int(c.x[k]/16)]
+		for dir := Up; dir <= Right; dir++ {
+			if w&(1<<uint(dir)) == 0 {
+				dirs[n] = int8(dir)
+				n++
+			}
+		}
+		c.state[k] = mobRandom
+		c.dir[k] = dirs[c.rnd.Intn(n)]
+	}
+
+	// enemies look down the corridors they are lined up with; the cells
+	// the player covers are worked out once for all of them
+	p := sdl.Rect{int32(px) + 4, int32(py) + 3, 8, 10} // as RailsThing.Hitbox
+	x0, x1 := cellSpan(int(p.X), int(p.W), m.width)
+	y0, y1 := cellSpan(int(p.Y), int(p.H), m.height)
+	for k, s := range c.state {
+		if !c.enemy[k] || s == mobExclamation {
+			continue
+		}
+		x, y := int(c.x[k]), int(c.y[k])
+		for _, look := range [...]struct {
+			dir      int
+			lined    bool
+			cvx, cvy int8
+		}{
+			{Left, y%16 == 0, -2, 0},
+			{Right, y%16 == 0, 2, 0},
+			{Up, x%16 == 0, 0, -2},
+			{Down, x%16 == 0, 0, 2},
+		} {
+			if !look.lined || !m.CorridorSees(x/16, y/16, look.dir, x0, y0, x1, y1) {
+				continue
+			}
+			if s != mobChase || c.cvx[k] != look.cvx || c.cvy[k] != look.cvy {
+				c.state[k] = mobExclamation
+				c.x[k] &^= 1
+				c.y[k] &^= 1
+				c.cvx[k], c.cvy[k] = look.cvx, look.cvy
+				c.timer[k] = 0
+			}
+			break
+		}
+	}
+
+	// move; wanderers stop at the next cell centre, chasers follow the
+	// flow field around corners and give up at a wall
+	var flow *flowField
+	for k, s := range c.state {
+		switch s {
+		case mobRandom:
+			d := dirOffsets[c.dir[k]]
+			c.x[k] += d.X
+			c.y[k] += d.Y
+			if c.x[k]%16 == 0 && c.y[k]%16 == 0 {
+				c.state[k] = mobNothing
+			}
+
+		case mobChase:
+			if c.x[k]%16 == 0 && c.y[k]%16 == 0 {
+				if flow == nil {
+					flow = m.FlowTo((px+8)/16, (py+8)/16)
+				}
+				i := int(c.y[k]/16)*m.width + int(c.x[k]/16)
+				if d := flow.dist[i]; d > 0 && d <= ChaseDistance {
+					o := dirOffsets[flow.dir[i]]
+					c.cvx[k], c.cvy[k] = int8(o.X*2), int8(o.Y*2)
+				}
+				if !m.isOpen(i, chaseDir(c.cvx[k], c.cvy[k])) {
+					c.state[k] = mobNothing
+					continue
+				}
+			}
+			c.x[k] += int32(c.cvx[k])
+			c.y[k] += int32(c.cvy[k])
+		}
+	}
+
+	for k, s := range c.state {
+		if s != mobWait && s != mobExclamation {
+			continue
+		}
+		if c.timer[k]--; c.timer[k] <= 0 {
+			if s == mobWait {
+				c.state[k] = mobNothing
+			} else {
+				c.state[k] = mobChase
+			}
+		}
+	}
+}
+
+// chaseDir returns the direction of a chase velocity.
+func chaseDir(cvx, cvy int8) int {
+	switch {
+	case cvx < 0:
+		return Left
+	case cvx > 0:
+		return Right
+	case cvy < 0:
+		return Up
+	}
+	return Down
+}
+
+// Mob returns a view of mob k.
+func (c *mobCrowd) Mob(k int) MobView {
+	return MobView{c, k}
+}
+
+// MobView is one mob of a crowd, with the parts of Mob that drawing and
+// collision use.
+type MobView struct {
+	crowd *mobCrowd
+	k     int
+}
+
+func (v MobView) Pos() (x, y int) {
+	return int(v.crowd.x[v.k]), int(v.crowd.y[v.k])
+}
+
+func (v MobView) Hitbox() sdl.Rect {
+	x, y := v.Pos()
+	return sdl.Rect{int32(x) + 4, int32(y) + 3, 8, 10}
+}
+
+func (v MobView) Kind() string {
+	if v.crowd.enemy[v.k] {
+		return "enemy"
+	}
+	return "friendly"
+}
+
+func (v MobView) State() string {
+	return mobStateNames[v.crowd.state[v.k]]
+}
+
+func (v MobView) Blit() {
+	c := v.crowd
+	x, y := v.Pos()
+	if c.enemy[v.k] {
+		c.sprites.bad[c.bad[v.k]].Blit(x, y)
+	} else {
+		c.sprites.good[c.good[v.k]].Blit(x, y)
+	}
+	if c.state[v.k] == mobExclamation {
+		c.sprites.exclamation.Blit(x, y-8)
+	}
+}
+
+// Blit draws every mob of the crowd.
+func (c *mobCrowd) Blit() {
+	for k := range c.x {
+		c.Mob(k).Blit()
+	}
+}
@@ -0,0 +1,180 @@
+package main
+
+import "container/heap"
+
+// pathCache remembers shortest paths between pairs of cells. Closing a
+// wall drops the paths that went through either of its cells, opening one
+// drops the paths it could shorten and every pair that had no path, so a
+// cached answer is always the one a fresh search would give.
+type pathCache struct {
+	paths map[pathKey][]MazeNode       // nil for pairs with no path
+	cells map[int]map[pathKey]struct{} // cached paths through each cell
+
+	// A* scratch, reused between searches; cells whose stamp differs
+	// from gen have not been reached by the current search
+	g     []int32
+	from  []int32
+	stamp []uint32
+	gen   uint32
+	open  pathQueue
+}
+
+type pathKey struct {
+	from, to int
+}
+
+type pathItem struct {
+	cell int32
+	f    int32
+}
+
+type pathQueue []pathItem
+
+func (q pathQueue) Len() int            { return len(q) }
+func (q pathQueue) Less(i, j int) bool  { return q[i].f < q[j].f }
+func (q pathQueue) Swap(i, j int)       { q[i], q[j] = q[j], q[i] }
+func (q *pathQueue) Push(x interface{}) { *q = append(*q, x.(pathItem)) }
+func (q *pathQueue) Pop() interface{} {
+	p := *q
+	x := p[len(p)-1]
+	*q = p[:len(p)-1]
+	return x
+}
+
+// Path returns the cells of a shortest path from a to b, both included,
+// or nil if b cannot be reached from a. The slice is shared with the cache
+// and must not be modified.
+func (m *Maze) Path(a, b MazeNode) []MazeNode {
+	c := m.paths
+	if c == nil {
+		n := len(m.walls)
+		c = &pathCache{
+			paths: make(map[pathKey][]MazeNode),
+			cells: make(map[int]map[pathKey]struct{}),
+			g:     make([]int32, n),
+			from:  make([]int32, n),
+			stamp: make([]uint32, n),
+		}
+		m.paths = c
+	}
+
+	k := pathKey{a.index(), b.index()}
+	if p, found := c.paths[k]; found {
+		return p
+	}
+	p := m.searchPath(k.from, k.to)
+	c.paths[k] = p
+	for _, n := range p {
+		i := n.index()
+		if c.cells[i] == nil {
+			c.cells[i] = make(map[pathKey]struct{})
+		}
+		c.cells[i][k] = struct{}{}
+	}
+	return p
+}
+
+// PathLen returns the number of steps from a to b, or -1 if b cannot be
+// reached from a.
+func (m *Maze) PathLen(a, b MazeNode) int {
+	return len(m.Path(a, b)) - 1
+}
+
+// manhattan is the A* heuristic; walls on the border are never opened, so
+// paths do not wrap around and it never overestimates.
+func (m *Maze) manhattan(i, j int) int {
+	dx := i%m.width - j%m.width
+	dy := i/m.width - j/m.width
+	if dx < 0 {
+		dx = -dx
+	}
+	if dy < 0 {
+		dy = -dy
+	}
+	return dx + dy
+}
+
+func (m *Maze) searchPath(start, goal int) []MazeNode {
+	c := m.paths
+	if c.gen++; c.gen == 0 {
+		for i := range c.stamp {
+			c.stamp[i] = 0
+		}
+		c.gen = 1
+	}
+
+	c.open = c.open[:0]
+	c.stamp[start] = c.gen
+	c.g[start] = 0
+	c.from[start] = -1
+	heap.Push(&c.open, pathItem{int32(start), int32(m.manhattan(start, goal))})
+	for c.open.Len() > 0 {
+		it := heap.Pop(&c.open).(pathItem)
+		i := int(it.cell)
+		if i == goal {
+			break
+		}
+		if it.f > c.g[i]+int32(m.manhattan(i, goal)) {
+			continue // superseded by a shorter way to i
+		}
+		for dir := Up; dir <= Right; dir++ {
+			if !m.isOpen(i, dir) {
+				continue
+			}
+			o := m.neighbor(i, dir)
+			g := c.g[i] + 1
+			if c.stamp[o] == c.gen && c.g[o] <= g {
+				continue
+			}
+			c.stamp[o] = c.gen
+			c.g[o] = g
+			c.from[o] = int32(i)
+			heap.Push(&c.open, pathItem{int32(o), g + int32(m.manhattan(o, goal))})
+		}
+	}
+	if c.stamp[goal] != c.gen {
+		return nil
+	}
+
+	p := make([]MazeNode, c.g[goal]+1)
+	for i, k := goal, len(p)-1; k >= 0; i, k = int(c.from[i]), k-1 {
+		p[k] = m.nodeAt(i)
+	}
+	return p
+}
+
+func (c *pathCache) drop(k pathKey) {
+	for _, n := range c.paths[k] {
+		i := n.index()
+		delete(c.cells[i], k)
+		if len(c.cells[i]) == 0 {
+			delete(c.cells, i)
+		}
+	}
+	delete(c.paths, k)
+}
+
+// wallClosed drops the paths that went through cell i or o.
+func (c *pathCache) wallClosed(i, o int) {
+	for _, j := range [2]int{i, o} {
+		for k := range c.cells[j] {
+			c.drop(k)
+		}
+	}
+}
+
+// wallOpened drops the pairs that had no path and the paths that the new
+// passage between i and o could make shorter.
+func (c *pathCache) wallOpened(m *Maze, i, o int) {
+	for k, p := range c.paths {
+		if p == nil {
+			c.drop(k)
+			continue
+		}
+		n := len(p) - 1
+		if m.manhattan(k.from, i)+1+m.manhattan(o, k.to) < n ||
+			m.manhattan(k.from, o)+1+m.manhattan(i, k.to) < n {
+			c.drop(k)
+		}
+	}
+}
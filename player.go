@@ -1,9 +1,6 @@
 package main
 
 import (
-	"math"
-	"math/rand"
-
 	"github.com/qeedquan/go-media/sdl"
 	"github.com/qeedquan/go-media/sdl/sdlmixer"
 )
@@ -27,7 +24,8 @@ func newRailsThing(gs *GameState, x, y int) *RailsThing {
 	r := &RailsThing{}
 	r.gs = gs
 	r.x, r.y = x, y
-	r.image = loadImage("hero_dude.png", colorBlackRandom(SpriteColors))
+	r.dir, r.wantedDir = NoDir, NoDir
+	r.image = loadRandomSprite("hero_dude.png", SpriteColors, gs.rnd.sprite)
 	r.death = loadSound("death.wav")
 	r.pickup = loadSound("pickup_friend.wav")
 
@@ -38,10 +36,6 @@ func newRailsThing(gs *GameState, x, y int) *RailsThing {
 	return r
 }
 
-func (r *RailsThing) Free() {
-	r.image.Free()
-}
-
 func (r *RailsThing) Hitbox() sdl.Rect {
 	return sdl.Rect{int32(r.x) + 4, int32(r.y) + 3, 8, 10}
 }
@@ -56,7 +50,7 @@ func (r *RailsThing) Update() {
 }
 
 func (r *RailsThing) updateDead() {
-	r.image.angle = math.Mod(r.image.angle+90, 360)
+	r.spinDead()
 	r.x, r.y = r.x+r.vx, r.y+r.vy
 	r.vy++
 }
@@ -66,30 +60,22 @@ func (r *RailsThing) updateAlive() {
 	k := sdl.GetKeyboardState()
 	switch {
 	case k[sdl.SCANCODE_UP] != 0:
-		r.wantedDir = "up"
+		r.wantedDir = Up
 	case k[sdl.SCANCODE_DOWN] != 0:
-		r.wantedDir = "down"
+		r.wantedDir = Down
 	case k[sdl.SCANCODE_LEFT] != 0:
-		r.wantedDir = "left"
+		r.wantedDir = Left
 	case k[sdl.SCANCODE_RIGHT] != 0:
-		r.wantedDir = "right"
+		r.wantedDir = Right
 	}
 
-	switch {
-	case r.dir == "up" && r.wantedDir == "down",
-		r.dir == "down" && r.wantedDir == "up",
-		r.dir == "left" && r.wantedDir == "right",
-		r.dir == "right" && r.wantedDir == "left":
+	if r.wantedDir != NoDir && r.dir == opposite(r.wantedDir) {
 		r.dir = r.wantedDir
 	}
 
 	if r.x%16 == 0 && r.y%16 == 0 {
 		n := s.maze.Node(r.x/16, r.y/16)
-		switch {
-		case r.wantedDir == "up" && n.open[Up],
-			r.wantedDir == "down" && n.open[Down],
-			r.wantedDir == "left" && n.open[Left],
-			r.wantedDir == "right" && n.open[Right]:
+		if r.wantedDir != NoDir && n.IsOpen(r.wantedDir) {
 			r.dir = r.wantedDir
 		}
 	}
@@ -98,27 +84,27 @@ func (r *RailsThing) updateAlive() {
 	mx, my := r.x/16, r.y/16
 	n := s.maze.Node(mx, my)
 	switch r.dir {
-	case "up":
+	case Up:
 		dy = -1
-		if r.y%16 == 0 && !n.open[Up] {
+		if r.y%16 == 0 && !n.IsOpen(Up) {
 			dy = 0
 		}
 
-	case "down":
+	case Down:
 		dy = 1
-		if r.y%16 == 0 && !n.open[Down] {
+		if r.y%16 == 0 && !n.IsOpen(Down) {
 			dy = 0
 		}
 
-	case "left":
+	case Left:
 		dx = -1
-		if r.x%16 == 0 && !n.open[Left] {
+		if r.x%16 == 0 && !n.IsOpen(Left) {
 			dx = 0
 		}
 
-	case "right":
+	case Right:
 		dx = 1
-		if r.x%16 == 0 && !n.open[Right] {
+		if r.x%16 == 0 && !n.IsOpen(Right) {
 			dx = 0
 		}
 	}
@@ -187,7 +173,6 @@ func (r *RailsThing) Die(killingMob *Mob) {
 		for i := range r.followers {
 			if m, ok := r.followers[i].(*Mob); ok {
 				m.Die()
-				m.Free()
 
 				l := len(r.followers) - 1
 				r.followers[i], r.followers = r.followers[l], r.followers[:l]
@@ -199,7 +184,7 @@ func (r *RailsThing) Die(killingMob *Mob) {
 	}
 
 	r.isDead = true
-	r.dvx = 3 - rand.Intn(7)
+	r.dvx = 3 - r.gs.rnd.mob.Intn(7)
 	r.dvy = -3
 }
 
@@ -0,0 +1,32 @@
+package main
+
+import "math/rand"
+
+// randStreams gives every subsystem its own random stream derived from one
+// seed, so a run given the same seed and the same input generates the same
+// mazes, fog, spawns, sprite colors and mob decisions, and one subsystem
+// drawing more numbers does not shift what the others get. The crowd
+// stream drives everything about the optional -crowd mobs, so turning
+// them on leaves the rest of the game as it was.
+type randStreams struct {
+	maze   *rand.Rand
+	fog    *rand.Rand
+	mob    *rand.Rand
+	sprite *rand.Rand
+	spawn  *rand.Rand
+	crowd  *rand.Rand
+}
+
+func newRandStreams(seed int64) *randStreams {
+	stream := func(k uint64) *rand.Rand {
+		return rand.New(rand.NewSource(int64(uint64(seed) ^ k*0x9E3779B97F4A7C15)))
+	}
+	return &randStreams{
+		maze:   stream(1),
+		fog:    stream(2),
+		mob:    stream(3),
+		sprite: stream(4),
+		spawn:  stream(5),
+		crowd:  stream(6),
+	}
+}
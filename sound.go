@@ -2,7 +2,9 @@ package main
 
 import (
 	"log"
+	"os"
 	"path/filepath"
+	"time"
 
 	"github.com/qeedquan/go-media/sdl/sdlmixer"
 )
@@ -17,10 +19,18 @@ func loadSound(name string) *sdlmixer.Chunk {
 		return chunk
 	}
 
+	start := time.Now()
 	chunk, err := sdlmixer.LoadWAV(filename)
 	if err != nil {
 		log.Fatal(err)
 	}
+	// the samples are kept as stored, so the file size is what stays
+	// resident
+	var size int
+	if fi, err := os.Stat(filename); err == nil {
+		size = int(fi.Size())
+	}
+	recordAsset(filename, time.Since(start), size)
 	sounds[filename] = chunk
 	return chunk
 }
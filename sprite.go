@@ -0,0 +1,105 @@
+package main
+
+import (
+	"image"
+	"math/rand"
+	"path/filepath"
+
+	"github.com/qeedquan/go-media/sdl"
+)
+
+// spriteSets are the sprites drawn in a color picked from a palette, with
+// the palettes they pick from.
+var spriteSets = []struct {
+	name    string
+	palette []sdl.Color
+}{
+	{"hero_dude.png", SpriteColors},
+	{"other_dude.png", SpriteColors},
+	{"ghost.png", BadColors},
+}
+
+type spriteKey struct {
+	filename string
+	color    sdl.Color
+}
+
+type tintedSprite struct {
+	key spriteKey
+	img image.Image
+}
+
+var (
+	sprites = make(map[spriteKey]*Image)
+
+	// spriteTints delivers the variants recolored in the background by
+	// warmSprites; they still have to be uploaded on the render thread
+	spriteTints chan tintedSprite
+)
+
+// loadSprite returns the named sprite painted in c. Every variant is
+// recolored and uploaded once and shared; each caller gets its own Image
+// so it can be rotated on its own, but the texture must not be freed.
+func loadSprite(name string, c sdl.Color) *Image {
+	k := spriteKey{filepath.Join(*dataDir, name), c}
+	m := sprites[k]
+	if m == nil {
+		m = newImage(colorBlack(c)(decodeImage(k.filename)))
+		sprites[k] = m
+	}
+	p := *m
+	return &p
+}
+
+// loadRandomSprite returns the named sprite in a color picked from palette.
+func loadRandomSprite(name string, palette []sdl.Color, rnd *rand.Rand) *Image {
+	return loadSprite(name, palette[randomSpriteColor(palette, rnd)])
+}
+
+// randomSpriteColor picks the index of a color of palette the way
+// loadRandomSprite does.
+func randomSpriteColor(palette []sdl.Color, rnd *rand.Rand) int {
+	return rnd.Intn(len(palette))
+}
+
+// warmSprites recolors every sprite variant in a background goroutine;
+// uploadSprites moves the finished ones to textures a few at a time, so the
+// work is done while the title screen idles.
+func warmSprites() {
+	var keys []spriteKey
+	var imgs []image.Image
+	for _, s := range spriteSets {
+		filename := filepath.Join(*dataDir, s.name)
+		img := decodeImage(filename)
+		for _, c := range s.palette {
+			keys = append(keys, spriteKey{filename, c})
+			imgs = append(imgs, img)
+		}
+	}
+
+	spriteTints = make(chan tintedSprite, len(keys))
+	go func() {
+		for i, k := range keys {
+			spriteTints <- tintedSprite{k, colorBlack(k.color)(imgs[i])}
+		}
+		close(spriteTints)
+	}()
+}
+
+// uploadSprites uploads the variants recolored so far.
+func uploadSprites() {
+	for spriteTints != nil {
+		select {
+		case t, ok := <-spriteTints:
+			if !ok {
+				spriteTints = nil
+				return
+			}
+			if sprites[t.key] == nil {
+				sprites[t.key] = newImage(t.img)
+			}
+		default:
+			return
+		}
+	}
+}
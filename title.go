@@ -51,4 +51,5 @@ func (t *Title) draw() {
 	printCenter(t.instFont, 270, BrightMagenta, "Press <SPACE> to start.")
 
 	screen.Present()
+	uploadSprites()
 }
@@ -0,0 +1,53 @@
+package main
+
+import (
+	"fmt"
+	"math/bits"
+)
+
+// Validate checks the maze invariants the game relies on in a single pass
+// over the wall array: every wall is seen the same from both of its
+// cells, the border is closed, there are no dead ends if the algorithm
+// promises none, and every cell, the lock in particular, can be reached
+// from the player. Connectivity is counted with union-find as the cells
+// are visited, so no search is needed.
+func (m *Maze) Validate(player, lock MazeNode) error {
+	w, h := m.width, m.height
+	sets := newDisjointSet(len(m.walls))
+	joined := 0
+	for i, v := range m.walls {
+		x, y := i%w, i/w
+		if x == 0 && v&(1<<Left) == 0 || x == w-1 && v&(1<<Right) == 0 ||
+			y == 0 && v&(1<<Up) == 0 || y == h-1 && v&(1<<Down) == 0 {
+			return fmt.Errorf("cell (%d, %d) is open to the border", x, y)
+		}
+		if m.algo != nil && m.algo.NoDeadEnds && bits.OnesCount8(v) >= 3 {
+			return fmt.Errorf("cell (%d, %d) is a dead end", x, y)
+		}
+		if x < w-1 {
+			if v>>Right&1 != m.walls[i+1]>>Left&1 {
+				return fmt.Errorf("wall between (%d, %d) and (%d, %d) is one sided", x, y, x+1, y)
+			}
+			if v&(1<<Right) == 0 && sets.Union(i, i+1) {
+				joined++
+			}
+		}
+		if y < h-1 {
+			if v>>Down&1 != m.walls[i+w]>>Up&1 {
+				return fmt.Errorf("wall between (%d, %d) and (%d, %d) is one sided", x, y, x, y+1)
+			}
+			if v&(1<<Down) == 0 && sets.Union(i, i+w) {
+				joined++
+			}
+		}
+	}
+
+	if sets.Find(player.index()) != sets.Find(lock.index()) {
+		return fmt.Errorf("lock at (%d, %d) cannot be reached from the player at (%d, %d)",
+			lock.x, lock.y, player.x, player.y)
+	}
+	if joined != len(m.walls)-1 {
+		return fmt.Errorf("cells are split into %d unconnected parts", len(m.walls)-joined)
+	}
+	return nil
+}